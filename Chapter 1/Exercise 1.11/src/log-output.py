@@ -1,24 +1,66 @@
+import fcntl
+import mmap
 import os
 import random
 import string
+import struct
+import threading
 from datetime import datetime
 from flask import Flask
 
 app = Flask(__name__)
 
-DATA_FILE = "/src/data/request_count.txt"
+# Memory-mapped counter written by ping-pong
+COUNTER_FILE = "/src/data/request_count.bin"
+COUNTER_FORMAT = struct.Struct("<Q")
+
+class CounterReader:
+    """Read-only view of ping-pong's memory-mapped counter.
+
+    Reads take a shared flock() so they never see a half-written value; the
+    threading.Lock is needed because flock() does not exclude threads that
+    share one file descriptor.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            self._map = mmap.mmap(fd, COUNTER_FORMAT.size, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Not sized by ping-pong yet
+            os.close(fd)
+            raise FileNotFoundError(self.path)
+        self._fd = fd
+
+    def value(self):
+        """Return the current count; 0 until ping-pong has created it."""
+        with self._lock:
+            if self._map is None:
+                try:
+                    self._open()
+                except FileNotFoundError:
+                    return 0
+
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                return COUNTER_FORMAT.unpack_from(self._map)[0]
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+counter = CounterReader(COUNTER_FILE)
 
 def generate_random_string(length=12):
     return "".join(random.choices(string.ascii_letters + string.digits, k=length))
 
 @app.route("/")
 def log_output():
-    # Read the current count
-    try:
-        with open(DATA_FILE, "r") as f:
-            count = f.read().strip()
-    except FileNotFoundError:
-        count = "0"
+    count = counter.value()
 
     timestamp = datetime.utcnow().isoformat()
     random_string = generate_random_string()
@@ -1,31 +1,102 @@
+import fcntl
+import mmap
 import os
+import struct
+import tempfile
+import threading
+import time
 from flask import Flask
 
 app = Flask(__name__)
 
-# Path to the shared file
+# Shared counter: one little-endian unsigned 64-bit integer, memory-mapped
+# by both containers
+COUNTER_FILE = "/src/data/request_count.bin"
+COUNTER_FORMAT = struct.Struct("<Q")
+# Plain-text copy of the count, kept for anything still reading it
 DATA_FILE = "/src/data/request_count.txt"
+EXPORT_INTERVAL_SECONDS = 1
 
-# Ensure the file exists
-if not os.path.exists(DATA_FILE):
-    with open(DATA_FILE, "w") as f:
-        f.write("0\n")
+class SharedCounter:
+    """Counter stored in a memory-mapped file.
 
-@app.route("/pingpong")
-def pingpong():
-    # Read current count
-    with open(DATA_FILE, "r") as f:
-        count = int(f.read().strip())
+    Increments take an exclusive flock() so several processes sharing the
+    volume never lose an update, and reads take a shared one so they never
+    see a half-written value. flock() does not exclude threads sharing the
+    same file descriptor, hence the extra threading.Lock.
+    """
+
+    def __init__(self, path, seed_path):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < COUNTER_FORMAT.size:
+                os.ftruncate(fd, COUNTER_FORMAT.size)
+                os.pwrite(fd, COUNTER_FORMAT.pack(read_text_count(seed_path)), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+        self._fd = fd
+        self._map = mmap.mmap(fd, COUNTER_FORMAT.size)
+        self._lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                count = COUNTER_FORMAT.unpack_from(self._map)[0] + 1
+                COUNTER_FORMAT.pack_into(self._map, 0, count)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return count
+
+    def value(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                return COUNTER_FORMAT.unpack_from(self._map)[0]
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
 
-    # Increment
-    count += 1
+def read_text_count(path):
+    # Carries the count over from the old text-only format
+    try:
+        with open(path, "r") as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return 0
 
-    # Write back
-    with open(DATA_FILE, "w") as f:
-        f.write(f"{count}\n")
+def write_text_count(path, count):
+    # Atomic replace so readers never see a partially written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{count}\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
 
+def export_text_count():
+    """Mirror the counter to DATA_FILE whenever it changes."""
+    exported = None
+    while True:
+        count = counter.value()
+        if count != exported:
+            try:
+                write_text_count(DATA_FILE, count)
+                exported = count
+            except OSError as e:
+                print(f"Error exporting count: {e}")
+        time.sleep(EXPORT_INTERVAL_SECONDS)
+
+counter = SharedCounter(COUNTER_FILE, DATA_FILE)
+
+@app.route("/pingpong")
+def pingpong():
+    count = counter.increment()
     return f"Pong! Count: {count}\n"
 
 if __name__ == "__main__":
+    threading.Thread(target=export_text_count, name="count-export", daemon=True).start()
     app.run(host="0.0.0.0", port=8000)
-
@@ -0,0 +1,237 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import aiohttp
+
+# Load generator for the todo backend. Each of --concurrency clients holds
+# one keep-alive connection and issues requests back to back for --duration
+# seconds, picking a scenario per request according to --mix. Results are
+# reported per scenario as JSON and can be compared against a baseline.
+
+SEED_BATCH_SIZE = 1000
+
+# name -> (method, path template). {id} is replaced with a known todo id.
+SCENARIOS = {
+    "list": ("GET", "/todos"),
+    "page": ("GET", "/todos?limit=50&after_id={id}"),
+    "open": ("GET", "/todos?done=false&limit=50"),
+    "get": ("GET", "/todos/{id}"),
+    "create": ("POST", "/todos"),
+    "update": ("PUT", "/todos/{id}"),
+    "delete": ("DELETE", "/todos/{id}"),
+}
+
+DEFAULT_MIX = "page=40,get=30,open=10,list=5,create=10,update=4,delete=1"
+
+def parse_mix(value):
+    mix = {}
+    for pair in value.split(","):
+        name, weight = pair.split("=", 1)
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}'")
+        mix[name] = float(weight)
+    return mix
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 2)
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+class Run:
+    """Shared state for one benchmark run."""
+
+    def __init__(self, base_url, mix):
+        self.base_url = base_url
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.ids = []
+        self.measuring = False
+        self.latencies = {name: [] for name in mix}
+        self.errors = {name: 0 for name in mix}
+
+    def pick_id(self):
+        return random.choice(self.ids) if self.ids else 1
+
+    async def request(self, session, name):
+        method, path = SCENARIOS[name]
+        body = None
+
+        if name == "create":
+            body = {"title": f"bench {random.random():.6f}"}
+        elif name == "update":
+            body = {"done": random.random() < 0.5}
+
+        if name == "delete":
+            if not self.ids:
+                return
+            todo_id = self.ids.pop(random.randrange(len(self.ids)))
+        else:
+            todo_id = self.pick_id()
+
+        url = self.base_url + path.format(id=todo_id)
+        start = time.monotonic()
+        try:
+            async with session.request(method, url, json=body) as response:
+                payload = await response.read()
+                ok = response.status < 400 or (response.status == 404 and name != "list")
+        except aiohttp.ClientError:
+            ok = False
+            payload = None
+        elapsed = time.monotonic() - start
+
+        if ok and name == "create" and payload:
+            self.ids.append(json.loads(payload)["id"])
+
+        if not self.measuring:
+            return
+        if ok:
+            self.latencies[name].append(elapsed)
+        else:
+            self.errors[name] += 1
+
+    async def client(self, session, deadline):
+        while time.monotonic() < deadline:
+            name = random.choices(self.names, self.weights)[0]
+            await self.request(session, name)
+
+async def seed(session, base_url, count):
+    """Create ``count`` todos through /todos/batch and return their ids."""
+    ids = []
+    while len(ids) < count:
+        size = min(SEED_BATCH_SIZE, count - len(ids))
+        items = [{"title": f"seed {len(ids) + i}"} for i in range(size)]
+        async with session.post(base_url + "/todos/batch", json=items) as response:
+            response.raise_for_status()
+            ids.extend(todo["id"] for todo in (await response.json())["todos"])
+    return ids
+
+async def run(args):
+    base_url = args.url.rstrip("/")
+    bench = Run(base_url, args.mix)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if args.seed:
+            bench.ids = await seed(session, base_url, args.seed)
+
+        if args.warmup:
+            deadline = time.monotonic() + args.warmup
+            await asyncio.gather(*(
+                bench.client(session, deadline) for _ in range(args.concurrency)
+            ))
+
+        bench.measuring = True
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            bench.client(session, deadline) for _ in range(args.concurrency)
+        ))
+        elapsed = time.monotonic() - start
+
+    all_latencies = [l for values in bench.latencies.values() for l in values]
+    return {
+        "config": {
+            "url": base_url,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": args.mix,
+            "seed": args.seed,
+        },
+        "total": summarize(all_latencies, sum(bench.errors.values()), elapsed),
+        "routes": {
+            name: summarize(bench.latencies[name], bench.errors[name], elapsed)
+            for name in args.mix
+        },
+    }
+
+def compare(result, baseline, tolerance):
+    """Return human-readable regressions of ``result`` against ``baseline``.
+
+    A scenario regresses when its p99 grows, or its throughput drops, by
+    more than ``tolerance`` (a fraction).
+    """
+    regressions = []
+    sections = [("total", result["total"], baseline.get("total", {}))]
+    sections += [
+        (name, stats, baseline.get("routes", {}).get(name, {}))
+        for name, stats in result["routes"].items()
+    ]
+
+    for name, current, before in sections:
+        if before.get("p99_ms") and current["p99_ms"] is not None:
+            if current["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: p99 {before['p99_ms']}ms -> {current['p99_ms']}ms"
+                )
+        if before.get("throughput_rps"):
+            if current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{name}: throughput {before['throughput_rps']} -> "
+                    f"{current['throughput_rps']} req/s"
+                )
+
+    return regressions
+
+def add_load_arguments(parser):
+    """Options shared with compare_modes.py that shape the generated load."""
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+        help=f"scenario weights (default: {DEFAULT_MIX})",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1000,
+        help="todos to create before measuring",
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the todo backend")
+    parser.add_argument("--url", default="http://localhost:8001")
+    add_load_arguments(parser)
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.10,
+        help="allowed p99/throughput regression as a fraction (default: 0.10)",
+    )
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
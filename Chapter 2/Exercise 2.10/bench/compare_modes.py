@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from bench import add_load_arguments, run
+
+# Runs bench.py's workload against the sync (Flask + psycopg2) and the async
+# (aiohttp + asyncpg) backend in turn, with identical settings and the same
+# database, and reports how the async mode compares per scenario.
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+MODES = {
+    "sync": os.path.join(SRC_DIR, "backend.py"),
+    "async": os.path.join(SRC_DIR, "backend_async.py"),
+}
+
+STARTUP_TIMEOUT_SECONDS = 30
+
+def wait_until_healthy(url, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"backend exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"backend not healthy after {STARTUP_TIMEOUT_SECONDS}s")
+
+def run_mode(mode, args):
+    env = dict(os.environ, BACKEND_PORT=str(args.port))
+    process = subprocess.Popen(
+        [sys.executable, MODES[mode]],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        args.url = f"http://127.0.0.1:{args.port}"
+        wait_until_healthy(args.url, process)
+        print(f"benchmarking {mode} mode...", file=sys.stderr)
+        return asyncio.run(run(args))
+    finally:
+        process.terminate()
+        process.wait()
+
+def ratio(after, before):
+    if not before or after is None:
+        return None
+    return round(after / before, 2)
+
+def compare_modes(results):
+    """Per section: both modes' numbers and async/sync ratios.
+
+    A throughput ratio above 1 and a p99 ratio below 1 favour async.
+    """
+    sync, async_ = results["sync"], results["async"]
+    sections = [("total", sync["total"], async_["total"])]
+    sections += [
+        (name, stats, async_["routes"][name])
+        for name, stats in sync["routes"].items()
+    ]
+
+    return {
+        name: {
+            "sync_rps": before["throughput_rps"],
+            "async_rps": after["throughput_rps"],
+            "throughput_ratio": ratio(after["throughput_rps"], before["throughput_rps"]),
+            "sync_p99_ms": before["p99_ms"],
+            "async_p99_ms": after["p99_ms"],
+            "p99_ratio": ratio(after["p99_ms"], before["p99_ms"]),
+        }
+        for name, before, after in sections
+    }
+
+def print_table(comparison):
+    header = f"{'scenario':<10} {'sync rps':>10} {'async rps':>10} {'x':>6} " \
+             f"{'sync p99':>10} {'async p99':>10} {'x':>6}"
+    print(header, file=sys.stderr)
+    for name, row in comparison.items():
+        print(
+            f"{name:<10} {row['sync_rps']:>10} {row['async_rps']:>10} "
+            f"{row['throughput_ratio'] or '-':>6} "
+            f"{row['sync_p99_ms'] or '-':>10} {row['async_p99_ms'] or '-':>10} "
+            f"{row['p99_ratio'] or '-':>6}",
+            file=sys.stderr,
+        )
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the sync and async backends with the same load"
+    )
+    parser.add_argument(
+        "--port", type=int, default=18001,
+        help="port each backend is started on in turn",
+    )
+    add_load_arguments(parser)
+    parser.add_argument("--output", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {mode: run_mode(mode, args) for mode in MODES}
+    report = {"results": results, "comparison": compare_modes(results)}
+
+    print_table(report["comparison"])
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,31 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g
+import atexit
+import contextlib
+import io
 import os
+import queue
+import random
+import signal
+import sys
 import time
 import logging
+from datetime import datetime, timezone
 import json
+import threading
+from collections import OrderedDict
 import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
 import psycopg2.extras
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
 
 # ======================
 # Configuration
@@ -14,13 +35,43 @@ PORT = int(os.getenv("BACKEND_PORT", 8001))
 MAX_TODO_LENGTH = 140
 
 DB_CONFIG = {
-    "host": "todo-db-svc",
-    "port": 3002,
+    "host": os.getenv("POSTGRES_HOST", "todo-db-svc"),
+    "port": int(os.getenv("POSTGRES_PORT", 3002)),
     "dbname": os.getenv("POSTGRES_DB"),
     "user": os.getenv("POSTGRES_USER"),
     "password": os.getenv("POSTGRES_PASSWORD"),
 }
 
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+# Idle connections older than this are pinged before being handed out
+DB_POOL_VALIDATE_AFTER = float(os.getenv("DB_POOL_VALIDATE_AFTER", 30))
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+# todos.id is a Postgres integer: larger ids cannot exist, and binding one
+# to a prepared statement fails instead of matching nothing
+MAX_TODO_ID = 2**31 - 1
+# Rows fetched per round trip when streaming the unpaginated list
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 500))
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 5000))
+# Batch inserts at least this large are loaded with COPY instead of VALUES
+BATCH_COPY_THRESHOLD = int(os.getenv("BATCH_COPY_THRESHOLD", 1000))
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 5))
+# Streamed lists larger than this are served but not cached
+CACHE_LIST_MAX_BYTES = int(os.getenv("CACHE_LIST_MAX_BYTES", 1024 * 1024))
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 200))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 0.5))
+# Comma-separated event=rate pairs, e.g. "http_request=0.1" keeps 10% of
+# INFO-level http_request lines. Warnings and errors are never sampled.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
 # ======================
 # JSON Logger (Loki)
 # ======================
@@ -28,7 +79,7 @@ DB_CONFIG = {
 class JsonFormatter(logging.Formatter):
     def format(self, record):
         log = {
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)),
             "level": record.levelname,
             "message": record.getMessage(),
         }
@@ -39,7 +90,118 @@ class JsonFormatter(logging.Formatter):
 
         return json.dumps(log)
 
-handler = logging.StreamHandler()
+class BatchingHandler(logging.Handler):
+    """Formats and writes records on a background thread, in batches.
+
+    emit() only enqueues, so a slow stream never blocks request threads. When
+    the queue is full the record is dropped and counted instead. A batch is
+    written once it holds ``batch_size`` records or ``flush_interval``
+    seconds after its first record arrived.
+    """
+
+    def __init__(self, stream, queue_size, batch_size, flush_interval, sample_rates):
+        super().__init__()
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rates = sample_rates
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.sampled_out = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, record):
+        # Called with self.lock held, so the counters need no extra locking
+        rate = self.sample_rates.get(record.msg)
+        if (
+            rate is not None
+            and record.levelno < logging.WARNING
+            and random.random() >= rate
+        ):
+            self.sampled_out += 1
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        stopping = False
+
+        while not stopping:
+            record = self.queue.get()
+            if record is None:
+                break
+
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            self._write(batch)
+
+    def _write(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            self.handleError(batch[-1])
+
+    def close(self):
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout=5)
+        super().close()
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+def parse_sample_rates(value):
+    rates = {}
+    for pair in value.split(","):
+        if "=" in pair:
+            event, rate = pair.split("=", 1)
+            rates[event.strip()] = float(rate)
+    return rates
+
+handler = BatchingHandler(
+    sys.stderr,
+    LOG_QUEUE_SIZE,
+    LOG_BATCH_SIZE,
+    LOG_FLUSH_INTERVAL,
+    parse_sample_rates(LOG_SAMPLE_RATES),
+)
 handler.setFormatter(JsonFormatter())
 
 logger = logging.getLogger("todo-backend")
@@ -47,6 +209,70 @@ logger.setLevel(logging.INFO)
 logger.addHandler(handler)
 logger.propagate = False
 
+# ======================
+# Metrics (Prometheus)
+# ======================
+
+HTTP_REQUESTS = Counter(
+    "todo_http_requests_total",
+    "HTTP requests handled",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "todo_http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "todo_http_requests_in_flight",
+    "HTTP requests currently being handled",
+)
+ERRORS = Counter(
+    "todo_errors_total",
+    "Unhandled exceptions and pool timeouts, by exception type",
+    ["type"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "todo_db_query_duration_seconds",
+    "Database query latency",
+    ["query"],
+)
+DB_QUERY_ERRORS = Counter(
+    "todo_db_query_errors_total",
+    "Database queries that raised",
+    ["query"],
+)
+
+@contextlib.contextmanager
+def observe_query(name):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_QUERY_ERRORS.labels(name).inc()
+        raise
+    finally:
+        DB_QUERY_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+def observe_request(method, route, status, duration_s):
+    HTTP_REQUESTS.labels(method, route, status).inc()
+    HTTP_REQUEST_SECONDS.labels(method, route, status).observe(duration_s)
+
+class StatsCollector:
+    """Publishes the /stats counters (pool, cache, logging) as gauges."""
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    def collect(self):
+        for prefix, source in self.sources.items():
+            for key, value in source.stats().items():
+                yield GaugeMetricFamily(
+                    f"todo_{prefix}_{key}",
+                    f"{key} from the /stats {prefix} section",
+                    value=value,
+                )
+
 # ======================
 # App
 # ======================
@@ -57,107 +283,871 @@ app = Flask(__name__)
 # Database
 # ======================
 
+class PoolTimeout(Exception):
+    pass
+
+# Hot-path statements, prepared once per connection on first use.
+# name -> (parameter types, SQL with $n placeholders)
+STATEMENTS = {
+    "todo_by_id": (
+        "(integer)",
+        "SELECT id, title, done FROM todos WHERE id = $1",
+    ),
+    "todo_insert": (
+        "(text, boolean)",
+        "INSERT INTO todos (title, done) VALUES ($1, $2) RETURNING id, title, done",
+    ),
+    "todo_update_title": (
+        "(text, integer)",
+        "UPDATE todos SET title = $1 WHERE id = $2 RETURNING id, title, done",
+    ),
+    "todo_update_done": (
+        "(boolean, integer)",
+        "UPDATE todos SET done = $1 WHERE id = $2 RETURNING id, title, done",
+    ),
+    "todo_update_title_done": (
+        "(text, boolean, integer)",
+        "UPDATE todos SET title = $1, done = $2 WHERE id = $3 RETURNING id, title, done",
+    ),
+    "todo_delete": (
+        "(integer)",
+        "DELETE FROM todos WHERE id = $1 RETURNING id",
+    ),
+    # Keyset over (updated_at, id): a batch write gives many rows the same
+    # updated_at, so the timestamp alone cannot say where a page ended
+    "todos_changed": (
+        "(timestamptz, integer, integer)",
+        "SELECT id, title, done, updated_at FROM todos "
+        "WHERE (updated_at, id) > ($1, $2) ORDER BY updated_at, id LIMIT $3",
+    ),
+}
+
+# ?done= filters are spelled out as literals rather than bound as parameters
+# so the planner can always match the partial indexes from migration 3.
+DONE_PREDICATES = {
+    None: "TRUE",
+    True: "done = true",
+    False: "done = false",
+}
+
+PAGE_STATEMENTS = {
+    None: "todos_page",
+    True: "todos_page_done",
+    False: "todos_page_open",
+}
+
+for done, name in PAGE_STATEMENTS.items():
+    STATEMENTS[name] = (
+        "(integer, integer)",
+        "SELECT id, title, done FROM todos "
+        f"WHERE id > $1 AND {DONE_PREDICATES[done]} ORDER BY id LIMIT $2",
+    )
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """Connection that remembers which STATEMENTS it has prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+def execute_prepared(cur, name, params):
+    """Run STATEMENTS[name] on ``cur``, preparing it on this connection first
+    if needed. Must be the first statement of its transaction."""
+    conn = cur.connection
+    placeholders = ", ".join(["%s"] * len(params))
+
+    for attempt in range(2):
+        if name not in conn.prepared:
+            types, sql = STATEMENTS[name]
+            cur.execute(f"PREPARE {name} {types} AS {sql};")
+            conn.prepared.add(name)
+
+        try:
+            with observe_query(name):
+                cur.execute(f"EXECUTE {name} ({placeholders});", params)
+            return
+        except psycopg2.errors.InvalidSqlStatementName:
+            # The server forgot our statements (e.g. DISCARD ALL from a
+            # proxy); start over with a clean slate.
+            conn.rollback()
+            conn.prepared.clear()
+            if attempt:
+                raise
+
+class ConnectionPool:
+    """Thread-safe pool of Postgres connections.
+
+    Connections are opened lazily up to ``maxconn``; callers that find the
+    pool exhausted wait up to ``timeout`` seconds before PoolTimeout is raised.
+    Connections that sat idle longer than ``validate_after`` seconds are pinged
+    on checkout and transparently replaced if the server dropped them.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, validate_after, **conn_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self.conn_kwargs = conn_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = []  # (conn, released_at), most recently used last
+        self._size = 0
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+
+    def _connect(self):
+        return psycopg2.connect(
+            connection_factory=PreparedConnection,
+            **self.conn_kwargs,
+        )
+
+    def open(self):
+        """Pre-open ``minconn`` connections."""
+        with self._cond:
+            missing = self.minconn - self._size
+            self._size += max(missing, 0)
+
+        for _ in range(missing):
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def _is_usable(self, conn, released_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - released_at < self.validate_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._discarded += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._checkouts += 1
+            if waited > 0.001:
+                self._waits += 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+            self._in_use += 1
+
+        try:
+            if conn is not None and not self._is_usable(conn, released_at):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        return conn
+
+    def putconn(self, conn):
+        reusable = not conn.closed
+        if reusable:
+            status = conn.get_transaction_status()
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                reusable = False
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+                self._discard(conn)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "min": self.minconn,
+                "max": self.maxconn,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "wait_ms_total": round(self._wait_time_total * 1000, 2),
+                "wait_ms_max": round(self._wait_time_max * 1000, 2),
+            }
+
+db_pool = ConnectionPool(
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_TIMEOUT,
+    DB_POOL_VALIDATE_AFTER,
+    **DB_CONFIG,
+)
+
 def get_db_conn():
-    return psycopg2.connect(**DB_CONFIG)
+    """Check out a pooled connection for the current request.
 
-def init_db():
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("""
+    The connection is returned to the pool by ``release_db_conn`` when the
+    app context tears down, so routes must not close it themselves.
+    """
+    if "db_conn" not in g:
+        g.db_conn = db_pool.getconn()
+    return g.db_conn
+
+@contextlib.contextmanager
+def autocommit(conn):
+    """Run single read-only statements without an explicit transaction.
+
+    Otherwise psycopg2 sends BEGIN first and the connection goes back to the
+    pool mid-transaction, costing a ROLLBACK in putconn; in autocommit mode
+    a lookup is one round trip and the connection comes back idle.
+    """
+    conn.autocommit = True
+    try:
+        yield conn
+    finally:
+        conn.autocommit = False
+
+@app.teardown_appcontext
+def release_db_conn(exc):
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        db_pool.putconn(conn)
+
+# ======================
+# Migrations
+# ======================
+
+# Advisory lock key held while migrating so replicas starting together
+# apply each migration exactly once.
+MIGRATION_LOCK_ID = 2010
+
+# (version, name, sql), applied in order and recorded in schema_migrations.
+# Never edit a released migration; append a new one instead.
+MIGRATIONS = [
+    (1, "create_todos", """
         CREATE TABLE IF NOT EXISTS todos (
             id SERIAL PRIMARY KEY,
             title TEXT NOT NULL,
             done BOOLEAN NOT NULL DEFAULT FALSE
         );
-    """)
-    conn.commit()
-    cur.close()
-    conn.close()
+    """),
+    (2, "add_todo_timestamps", """
+        ALTER TABLE todos
+            ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+        CREATE OR REPLACE FUNCTION todos_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER todos_touch_updated_at
+            BEFORE UPDATE ON todos
+            FOR EACH ROW EXECUTE FUNCTION todos_touch_updated_at();
+    """),
+    (3, "index_todos_by_done", """
+        CREATE INDEX IF NOT EXISTS todos_open_id_idx ON todos (id) WHERE done = false;
+        CREATE INDEX IF NOT EXISTS todos_done_id_idx ON todos (id) WHERE done = true;
+    """),
+    (4, "index_todos_by_updated_at", """
+        CREATE INDEX IF NOT EXISTS todos_updated_at_id_idx ON todos (updated_at, id);
+    """),
+]
+
+def init_db():
+    """Apply any pending MIGRATIONS, each in its own transaction."""
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        """)
+        conn.commit()
+
+        cur.execute("SELECT version FROM schema_migrations;")
+        applied = {row[0] for row in cur.fetchall()}
+
+        for version, name, sql in MIGRATIONS:
+            if version in applied:
+                continue
+
+            cur.execute(sql)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                (version, name)
+            )
+            conn.commit()
+
+            logger.info(
+                "migration_applied",
+                extra={"extra_data": {"version": version, "name": name}}
+            )
+
+        cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cur.close()
+    finally:
+        # Closing the session also releases the advisory lock on failure
+        conn.close()
+
+# ======================
+# Cache
+# ======================
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``generation`` is bumped on every invalidation. Readers capture it before
+    querying the database and hand it back to ``set``, so a result read
+    before a concurrent write can never be stored after that write's
+    invalidation.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self._misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation):
+        with self._lock:
+            if generation == self.generation:
+                self._set(key, value)
+
+    def _set(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, predicate):
+        """Drop every key for which ``predicate(key)`` is true."""
+        with self._lock:
+            self._invalidate(predicate)
+
+    def invalidate_and_set(self, predicate, key, value, generation):
+        """Invalidate after a write, then cache the row that write returned.
+
+        ``generation`` must be captured before the write's SQL ran. If any
+        other invalidation happened since, another write may have committed
+        after ours, so ``value`` could already be stale and is not stored.
+        """
+        with self._lock:
+            unchanged = generation == self.generation
+            self._invalidate(predicate)
+            if unchanged:
+                self._set(key, value)
+
+    def _invalidate(self, predicate):
+        self.generation += 1
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+# Keys are ("todo", id) for single todos and ("list", ...) for list responses.
+todo_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+def todos_predicate(todo_ids):
+    todo_keys = {("todo", todo_id) for todo_id in todo_ids}
+    return lambda key: key[0] == "list" or key in todo_keys
+
+def invalidate_todos(*todo_ids):
+    """Forget the given todos and every cached list after a write."""
+    todo_cache.invalidate(todos_predicate(todo_ids))
+
+def invalidate_and_cache_todo(todo, generation):
+    """invalidate_todos() for a single-todo write, then cache the written
+    row; ``generation`` is todo_cache.generation from before the write."""
+    todo_cache.invalidate_and_set(
+        todos_predicate([todo["id"]]), ("todo", todo["id"]), todo, generation
+    )
 
 # ======================
 # Request Logging
 # ======================
 
+def route_label():
+    # The URL rule, not the path, so /todos/1 and /todos/2 share a series
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
 @app.before_request
 def start_timer():
     g.start_time = time.time()
+    HTTP_IN_FLIGHT.inc()
 
-@app.after_request
-def log_request(response):
-    duration_ms = round((time.time() - g.start_time) * 1000, 2)
+def record_request(method, route, path, status, remote_addr, start_time):
+    duration_s = time.time() - start_time
+    duration_ms = round(duration_s * 1000, 2)
+    observe_request(method, route, status, duration_s)
 
     logger.info(
         "http_request",
         extra={
             "extra_data": {
-                "method": request.method,
-                "path": request.path,
-                "status": response.status_code,
+                "method": method,
+                "path": path,
+                "status": status,
                 "duration_ms": duration_ms,
-                "remote_addr": request.remote_addr,
+                "remote_addr": remote_addr,
             }
         }
     )
 
+@app.after_request
+def log_request(response):
+    args = (
+        request.method,
+        route_label(),
+        request.path,
+        response.status_code,
+        request.remote_addr,
+        g.start_time,
+    )
+
+    if not response.is_streamed:
+        record_request(*args)
+        return response
+
+    # A streamed body (the unpaginated list) runs its query while the
+    # server sends it, after this hook; time and count it until then.
+    g.streamed = True
+
+    def finish_streamed():
+        record_request(*args)
+        HTTP_IN_FLIGHT.dec()
+
+    response.call_on_close(finish_streamed)
     return response
 
+@app.teardown_request
+def finish_request(exc):
+    if "start_time" in g and not g.get("streamed"):
+        HTTP_IN_FLIGHT.dec()
+    if exc is not None:
+        ERRORS.labels(type(exc).__name__).inc()
+
+# ======================
+# Validation
+# ======================
+
+TITLE_ERRORS = {
+    "missing_or_empty_title": "Missing or empty 'title'",
+    "title_too_long": f"'title' must be {MAX_TODO_LENGTH} characters or fewer",
+}
+
+def validate_title(title):
+    """Return (stripped_title, reason); reason is a TITLE_ERRORS key or None."""
+    if not isinstance(title, str) or not title.strip():
+        return None, "missing_or_empty_title"
+
+    title = title.strip()
+    if len(title) > MAX_TODO_LENGTH:
+        return title, "title_too_long"
+
+    return title, None
+
+def is_todo_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def batch_shape_error(items):
+    """Return (message, status) if ``items`` is not an acceptable batch."""
+    if not isinstance(items, list) or not items:
+        return "Expected a non-empty JSON array", 400
+
+    if len(items) > MAX_BATCH_SIZE:
+        return f"Batch must contain {MAX_BATCH_SIZE} items or fewer", 413
+
+    return None
+
+def validate_create_items(items):
+    """Return ([(title, done)], errors) for a batch create."""
+    rows = []
+    errors = []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Item must be an object"})
+            continue
+
+        title, reason = validate_title(item.get("title"))
+        if reason:
+            errors.append({"index": index, "error": TITLE_ERRORS[reason]})
+            continue
+
+        rows.append((title, bool(item.get("done", False))))
+
+    return rows, errors
+
+def validate_update_items(items):
+    """Return ([(id, title_or_None, done_or_None)], errors) for a batch update."""
+    rows = []
+    errors = []
+    seen_ids = set()
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not is_todo_id(item.get("id")):
+            errors.append({"index": index, "error": "Item must have an integer 'id'"})
+            continue
+
+        if item["id"] in seen_ids:
+            errors.append({"index": index, "error": "Duplicate 'id' in batch"})
+            continue
+        seen_ids.add(item["id"])
+
+        if "title" not in item and "done" not in item:
+            errors.append({"index": index, "error": "No valid fields to update"})
+            continue
+
+        title = None
+        if "title" in item:
+            title, reason = validate_title(item["title"])
+            if reason:
+                errors.append({"index": index, "error": TITLE_ERRORS[reason]})
+                continue
+
+        done = bool(item["done"]) if "done" in item else None
+        rows.append((item["id"], title, done))
+
+    return rows, errors
+
+def validate_delete_ids(ids):
+    return [
+        {"index": index, "error": "Item must be an integer id"}
+        for index, todo_id in enumerate(ids)
+        if not is_todo_id(todo_id)
+    ]
+
 # ======================
 # Routes
 # ======================
 
+def parse_done_arg(args):
+    """Return the ?done= filter as True, False or None (no filter)."""
+    if "done" not in args:
+        return None
+
+    value = args["done"].lower()
+    if value in ("true", "1"):
+        return True
+    if value in ("false", "0"):
+        return False
+    raise ValueError("'done' must be true or false")
+
+def parse_page_args(args):
+    """Return (limit, after_id) from the query string, or None for both
+    when the client did not ask for pagination."""
+    if "limit" not in args and "after_id" not in args:
+        return None, None
+
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+        after_id = int(args.get("after_id", 0))
+    except ValueError:
+        raise ValueError("'limit' and 'after_id' must be integers")
+
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+    if abs(after_id) > MAX_TODO_ID:
+        raise ValueError("'after_id' is out of range")
+
+    return limit, after_id
+
+def parse_changes_args(args):
+    """Return (updated_after, after_id, limit) for ?updated_after=, or None
+    when the client did not ask for changed todos."""
+    if "updated_after" not in args:
+        return None
+    if "done" in args:
+        raise ValueError("'updated_after' cannot be combined with 'done'")
+
+    try:
+        updated_after = datetime.fromisoformat(args["updated_after"])
+    except ValueError:
+        raise ValueError("'updated_after' must be an ISO 8601 timestamp")
+    if updated_after.tzinfo is None:
+        updated_after = updated_after.replace(tzinfo=timezone.utc)
+
+    limit, after_id = parse_page_args(args)
+    if limit is None:
+        limit, after_id = DEFAULT_PAGE_SIZE, 0
+    return updated_after, after_id, limit
+
+def changes_page(rows, limit):
+    """Build the ?updated_after= response from up to ``limit + 1`` rows.
+
+    Clients continue from the last todo's (updated_at, id); the next_*
+    fields are null on the last page, like next_after_id for id paging.
+    """
+    todos = [dict(row) for row in rows[:limit]]
+    for todo in todos:
+        todo["updated_at"] = todo["updated_at"].isoformat()
+
+    more = len(rows) > limit
+    return {
+        "todos": todos,
+        "next_updated_after": todos[-1]["updated_at"] if more else None,
+        "next_after_id": todos[-1]["id"] if more else None,
+    }
+
+class StreamedList:
+    """Encodes rows as chunks of one JSON array.
+
+    A copy of the body is kept while it stays under CACHE_LIST_MAX_BYTES so
+    the finished list can be stored in the cache.
+    """
+
+    def __init__(self, cache_key, generation):
+        self.cache_key = cache_key
+        self.generation = generation
+        self.first = True
+        self.kept = ["["]
+        self.kept_bytes = 1
+
+    def start(self):
+        return "["
+
+    def chunk(self, rows):
+        chunk = ",".join(json.dumps(dict(row)) for row in rows)
+        if not self.first:
+            chunk = "," + chunk
+        self.first = False
+
+        if self.kept is not None:
+            self.kept_bytes += len(chunk)
+            if self.kept_bytes <= CACHE_LIST_MAX_BYTES:
+                self.kept.append(chunk)
+            else:
+                self.kept = None
+        return chunk
+
+    def finish(self):
+        if self.kept is not None:
+            self.kept.append("]")
+            todo_cache.set(self.cache_key, "".join(self.kept), self.generation)
+        return "]"
+
+def stream_todos(conn, done, generation):
+    """Yield the full todo list as a JSON array, STREAM_CHUNK_ROWS at a time.
+
+    Uses a server-side (named) cursor so neither Postgres nor this process
+    materialises the whole table.
+    """
+    cur = conn.cursor(
+        name="stream_todos",
+        cursor_factory=psycopg2.extras.DictCursor,
+    )
+    cur.itersize = STREAM_CHUNK_ROWS
+    with observe_query("todos_stream"):
+        cur.execute(
+            "SELECT id, title, done FROM todos "
+            f"WHERE {DONE_PREDICATES[done]} ORDER BY id;"
+        )
+
+    body = StreamedList(("list", done), generation)
+    yield body.start()
+
+    while True:
+        with observe_query("todos_stream_fetch"):
+            rows = cur.fetchmany(STREAM_CHUNK_ROWS)
+        if not rows:
+            break
+        yield body.chunk(rows)
+
+    cur.close()
+    conn.commit()
+    yield body.finish()
+
 @app.route("/todos", methods=["GET"])
 def get_todos():
-    conn = get_db_conn()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    try:
+        changes = parse_changes_args(request.args)
+        limit, after_id = parse_page_args(request.args)
+        done = parse_done_arg(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    cur.execute("SELECT id, title, done FROM todos ORDER BY id;")
-    todos = [dict(row) for row in cur.fetchall()]
+    if changes is not None:
+        # Polled for freshness, so never served from the cache
+        updated_after, after_id, limit = changes
+        with autocommit(get_db_conn()) as conn:
+            cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            execute_prepared(cur, "todos_changed", (updated_after, after_id, limit + 1))
+            rows = cur.fetchall()
+            cur.close()
+        return jsonify(changes_page(rows, limit)), 200
 
-    cur.close()
-    conn.close()
-    return jsonify(todos), 200
+    generation = todo_cache.generation
+
+    if limit is None:
+        cached = todo_cache.get(("list", done))
+        if cached is not None:
+            return Response(cached, mimetype="application/json"), 200
+
+        # The body is produced after the view returns, so the connection
+        # is held until the server closes the response, not the app context.
+        conn = db_pool.getconn()
+        response = Response(
+            stream_todos(conn, done, generation), mimetype="application/json"
+        )
+        response.call_on_close(lambda: db_pool.putconn(conn))
+        return response, 200
+
+    cache_key = ("list", done, after_id, limit)
+    page = todo_cache.get(cache_key)
+    if page is not None:
+        return jsonify(page), 200
+
+    with autocommit(get_db_conn()) as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+        # Fetch one extra row to know whether another page exists
+        execute_prepared(cur, PAGE_STATEMENTS[done], (after_id, limit + 1))
+        rows = cur.fetchall()
+        cur.close()
+
+    todos = [dict(row) for row in rows[:limit]]
+    next_after_id = todos[-1]["id"] if len(rows) > limit else None
+    page = {"todos": todos, "next_after_id": next_after_id}
+    todo_cache.set(cache_key, page, generation)
+
+    return jsonify(page), 200
 
 @app.route("/todos", methods=["POST"])
 def create_todo():
     data = request.get_json()
+    if not isinstance(data, dict):
+        data = None
+    title, reason = validate_title(data.get("title") if data else None)
 
-    if not data or "title" not in data or not data["title"].strip():
+    if reason == "missing_or_empty_title":
         logger.warning(
             "todo_rejected",
-            extra={"extra_data": {"reason": "missing_or_empty_title"}}
+            extra={"extra_data": {"reason": reason}}
         )
-        return jsonify({"error": "Missing or empty 'title'"}), 400
-
-    title = data["title"].strip()
+        return jsonify({"error": TITLE_ERRORS[reason]}), 400
 
-    if len(title) > MAX_TODO_LENGTH:
+    if reason == "title_too_long":
         logger.warning(
             "todo_rejected",
             extra={
                 "extra_data": {
-                    "reason": "title_too_long",
+                    "reason": reason,
                     "length": len(title),
                     "max_length": MAX_TODO_LENGTH,
                     "title_preview": title[:50],
                 }
             }
         )
-        return jsonify({
-            "error": f"'title' must be {MAX_TODO_LENGTH} characters or fewer"
-        }), 400
+        return jsonify({"error": TITLE_ERRORS[reason]}), 400
 
+    generation = todo_cache.generation
     conn = get_db_conn()
     cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
 
-    cur.execute(
-        "INSERT INTO todos (title, done) VALUES (%s, %s) RETURNING id, title, done;",
-        (title, bool(data.get("done", False)))
+    execute_prepared(
+        cur, "todo_insert", (title, bool(data.get("done", False)))
     )
 
     todo = dict(cur.fetchone())
     conn.commit()
     cur.close()
-    conn.close()
+
+    invalidate_and_cache_todo(todo, generation)
 
     logger.info(
         "todo_created",
@@ -174,58 +1164,63 @@ def create_todo():
 
 @app.route("/todos/<int:todo_id>", methods=["GET"])
 def get_todo(todo_id):
-    conn = get_db_conn()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    if todo_id > MAX_TODO_ID:
+        return jsonify({"error": "Todo not found"}), 404
 
-    cur.execute(
-        "SELECT id, title, done FROM todos WHERE id = %s;",
-        (todo_id,)
-    )
-    row = cur.fetchone()
+    generation = todo_cache.generation
+    todo = todo_cache.get(("todo", todo_id))
+    if todo is not None:
+        return jsonify(todo), 200
 
-    cur.close()
-    conn.close()
+    with autocommit(get_db_conn()) as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        execute_prepared(cur, "todo_by_id", (todo_id,))
+        row = cur.fetchone()
+        cur.close()
 
     if not row:
         return jsonify({"error": "Todo not found"}), 404
 
-    return jsonify(dict(row)), 200
+    todo = dict(row)
+    todo_cache.set(("todo", todo_id), todo, generation)
+    return jsonify(todo), 200
 
 @app.route("/todos/<int:todo_id>", methods=["PUT"])
 def update_todo(todo_id):
+    if todo_id > MAX_TODO_ID:
+        return jsonify({"error": "Todo not found"}), 404
+
     data = request.get_json()
-    if not data:
+    if not data or not isinstance(data, dict):
         return jsonify({"error": "No data provided"}), 400
 
     fields = []
     values = []
 
     if "title" in data:
-        title = data["title"].strip()
-        if not title:
+        title, reason = validate_title(data["title"])
+        if reason == "missing_or_empty_title":
             return jsonify({"error": "'title' cannot be empty"}), 400
 
-        if len(title) > MAX_TODO_LENGTH:
+        if reason == "title_too_long":
             logger.warning(
                 "todo_update_rejected",
                 extra={
                     "extra_data": {
                         "todo_id": todo_id,
-                        "reason": "title_too_long",
+                        "reason": reason,
                         "length": len(title),
                         "max_length": MAX_TODO_LENGTH,
                     }
                 }
             )
-            return jsonify({
-                "error": f"'title' must be {MAX_TODO_LENGTH} characters or fewer"
-            }), 400
+            return jsonify({"error": TITLE_ERRORS[reason]}), 400
 
-        fields.append("title = %s")
+        fields.append("title")
         values.append(title)
 
     if "done" in data:
-        fields.append("done = %s")
+        fields.append("done")
         values.append(bool(data["done"]))
 
     if not fields:
@@ -233,27 +1228,23 @@ def update_todo(todo_id):
 
     values.append(todo_id)
 
+    generation = todo_cache.generation
     conn = get_db_conn()
     cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
 
-    cur.execute(
-        f"""
-        UPDATE todos
-        SET {', '.join(fields)}
-        WHERE id = %s
-        RETURNING id, title, done;
-        """,
-        values
-    )
+    # One prepared statement per field combination, e.g. todo_update_title_done
+    execute_prepared(cur, "todo_update_" + "_".join(fields), values)
 
     row = cur.fetchone()
     conn.commit()
     cur.close()
-    conn.close()
 
     if not row:
         return jsonify({"error": "Todo not found"}), 404
 
+    todo = dict(row)
+    invalidate_and_cache_todo(todo, generation)
+
     logger.info(
         "todo_updated",
         extra={
@@ -265,22 +1256,26 @@ def update_todo(todo_id):
         }
     )
 
-    return jsonify(dict(row)), 200
+    return jsonify(todo), 200
 
 @app.route("/todos/<int:todo_id>", methods=["DELETE"])
 def delete_todo(todo_id):
+    if todo_id > MAX_TODO_ID:
+        return jsonify({"error": "Todo not found"}), 404
+
     conn = get_db_conn()
     cur = conn.cursor()
 
-    cur.execute("DELETE FROM todos WHERE id = %s RETURNING id;", (todo_id,))
+    execute_prepared(cur, "todo_delete", (todo_id,))
     deleted = cur.fetchone()
     conn.commit()
     cur.close()
-    conn.close()
 
     if not deleted:
         return jsonify({"error": "Todo not found"}), 404
 
+    invalidate_todos(todo_id)
+
     logger.info(
         "todo_deleted",
         extra={"extra_data": {"todo_id": todo_id}}
@@ -288,16 +1283,239 @@ def delete_todo(todo_id):
 
     return jsonify({"message": "Todo deleted successfully"}), 200
 
+# ======================
+# Batch Routes
+# ======================
+
+def read_batch():
+    """Return (items, None) for a valid batch body, or (None, error_response)."""
+    items = request.get_json(silent=True)
+
+    shape_error = batch_shape_error(items)
+    if shape_error:
+        message, status = shape_error
+        return None, (jsonify({"error": message}), status)
+
+    return items, None
+
+def log_batch_rejected(event, items, errors):
+    logger.warning(
+        event,
+        extra={
+            "extra_data": {
+                "reason": "invalid_items",
+                "batch_size": len(items),
+                "invalid_count": len(errors),
+            }
+        }
+    )
+
+def reject_batch(event, items, errors):
+    log_batch_rejected(event, items, errors)
+    return jsonify({
+        "error": "Batch rejected, no changes were made",
+        "errors": errors,
+    }), 400
+
+def copy_escape(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+def copy_insert_todos(cur, rows):
+    """Insert (title, done) rows through COPY into a temp table.
+
+    COPY cannot return the generated ids, so rows are staged first and moved
+    into todos with a single INSERT ... SELECT ... RETURNING.
+    """
+    cur.execute("""
+        CREATE TEMP TABLE todos_import (
+            position INTEGER,
+            title TEXT,
+            done BOOLEAN
+        ) ON COMMIT DROP;
+    """)
+
+    buf = io.StringIO()
+    for position, (title, done) in enumerate(rows):
+        buf.write(f"{position}\t{copy_escape(title)}\t{'t' if done else 'f'}\n")
+    buf.seek(0)
+    cur.copy_expert("COPY todos_import (position, title, done) FROM STDIN;", buf)
+
+    cur.execute("""
+        INSERT INTO todos (title, done)
+        SELECT title, done FROM todos_import ORDER BY position
+        RETURNING id, title, done;
+    """)
+    return cur.fetchall()
+
+@app.route("/todos/batch", methods=["POST"])
+def create_todos_batch():
+    items, error = read_batch()
+    if error:
+        return error
+
+    rows, errors = validate_create_items(items)
+    if errors:
+        return reject_batch("todo_batch_rejected", items, errors)
+
+    conn = get_db_conn()
+    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+    if len(rows) >= BATCH_COPY_THRESHOLD:
+        with observe_query("todos_batch_copy"):
+            created = copy_insert_todos(cur, rows)
+    else:
+        with observe_query("todos_batch_insert"):
+            created = psycopg2.extras.execute_values(
+                cur,
+                "INSERT INTO todos (title, done) VALUES %s RETURNING id, title, done;",
+                rows,
+                page_size=len(rows),
+                fetch=True,
+            )
+
+    todos = [dict(row) for row in created]
+    conn.commit()
+    cur.close()
+
+    invalidate_todos()
+
+    logger.info(
+        "todo_batch_created",
+        extra={
+            "extra_data": {
+                "count": len(todos),
+                "method": "copy" if len(rows) >= BATCH_COPY_THRESHOLD else "values",
+            }
+        }
+    )
+
+    return jsonify({"todos": todos}), 201
+
+@app.route("/todos/batch", methods=["PUT"])
+def update_todos_batch():
+    items, error = read_batch()
+    if error:
+        return error
+
+    rows, errors = validate_update_items(items)
+    if errors:
+        return reject_batch("todo_batch_update_rejected", items, errors)
+
+    conn = get_db_conn()
+    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+    with observe_query("todos_batch_update"):
+        updated = psycopg2.extras.execute_values(
+            cur,
+            """
+            UPDATE todos AS t
+            SET title = COALESCE(v.title, t.title),
+                done = COALESCE(v.done, t.done)
+            FROM (VALUES %s) AS v (id, title, done)
+            WHERE t.id = v.id
+            RETURNING t.id, t.title, t.done;
+            """,
+            rows,
+            template="(%s::integer, %s::text, %s::boolean)",
+            page_size=len(rows),
+            fetch=True,
+        )
+
+    by_id = {row["id"]: dict(row) for row in updated}
+    conn.commit()
+    cur.close()
+
+    invalidate_todos(*by_id)
+
+    todos = [by_id[todo_id] for todo_id, _, _ in rows if todo_id in by_id]
+    not_found = [todo_id for todo_id, _, _ in rows if todo_id not in by_id]
+
+    logger.info(
+        "todo_batch_updated",
+        extra={"extra_data": {"count": len(todos), "not_found": len(not_found)}}
+    )
+
+    return jsonify({"todos": todos, "not_found": not_found}), 200
+
+@app.route("/todos/batch", methods=["DELETE"])
+def delete_todos_batch():
+    ids, error = read_batch()
+    if error:
+        return error
+
+    errors = validate_delete_ids(ids)
+    if errors:
+        return reject_batch("todo_batch_delete_rejected", ids, errors)
+
+    conn = get_db_conn()
+    cur = conn.cursor()
+
+    with observe_query("todos_batch_delete"):
+        cur.execute("DELETE FROM todos WHERE id = ANY(%s) RETURNING id;", (ids,))
+        deleted = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    cur.close()
+
+    invalidate_todos(*deleted)
+
+    not_found = [todo_id for todo_id in ids if todo_id not in deleted]
+
+    logger.info(
+        "todo_batch_deleted",
+        extra={"extra_data": {"count": len(deleted), "not_found": len(not_found)}}
+    )
+
+    return jsonify({"deleted": sorted(deleted), "not_found": not_found}), 200
+
+# ======================
+# Operational Routes
+# ======================
+
 @app.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({
+        "pool": db_pool.stats(),
+        "cache": todo_cache.stats(),
+        "logging": handler.stats(),
+    }), 200
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST), 200
+
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    ERRORS.labels("PoolTimeout").inc()
+    logger.warning(
+        "db_pool_exhausted",
+        extra={"extra_data": {"path": request.path, **db_pool.stats()}}
+    )
+    return jsonify({"error": "Database busy, try again"}), 503
+
 # ======================
 # Entrypoint
 # ======================
 
 if __name__ == "__main__":
+    # Exit normally on SIGTERM so atexit flushes queued log lines
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     init_db()
+    db_pool.open()
+    REGISTRY.register(StatsCollector({
+        "db_pool": db_pool,
+        "cache": todo_cache,
+        "log": handler,
+    }))
     app.run(host="0.0.0.0", port=PORT, debug=False)
 
 
@@ -0,0 +1,653 @@
+import asyncio
+import contextlib
+import json
+import time
+
+import asyncpg
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from backend import (
+    BATCH_COPY_THRESHOLD,
+    DB_CONFIG,
+    DB_POOL_MAX,
+    DB_POOL_MIN,
+    DB_POOL_TIMEOUT,
+    DB_POOL_VALIDATE_AFTER,
+    DONE_PREDICATES,
+    ERRORS,
+    HTTP_IN_FLIGHT,
+    MAX_TODO_ID,
+    MAX_TODO_LENGTH,
+    PAGE_STATEMENTS,
+    PORT,
+    STATEMENTS,
+    STREAM_CHUNK_ROWS,
+    TITLE_ERRORS,
+    PoolTimeout,
+    StatsCollector,
+    StreamedList,
+    batch_shape_error,
+    changes_page,
+    handler,
+    init_db,
+    invalidate_and_cache_todo,
+    invalidate_todos,
+    log_batch_rejected,
+    logger,
+    observe_query,
+    observe_request,
+    parse_changes_args,
+    parse_done_arg,
+    parse_page_args,
+    todo_cache,
+    validate_create_items,
+    validate_delete_ids,
+    validate_title,
+    validate_update_items,
+)
+
+# Asyncio serving mode (BACKEND_MODE=async): the same /todos API as
+# backend.py, served by aiohttp on an asyncpg pool. Configuration,
+# validation, the read cache and the JSON logger are shared with the
+# sync app so both modes behave identically.
+
+# ======================
+# Database
+# ======================
+
+class AsyncConnectionPool:
+    """asyncpg pool with the same checkout timeout and stats as ConnectionPool.
+
+    asyncpg replaces connections that were closed underneath it, and idle
+    connections are recycled after DB_POOL_VALIDATE_AFTER seconds.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+
+    async def open(self):
+        self.pool = await asyncpg.create_pool(
+            host=DB_CONFIG["host"],
+            port=DB_CONFIG["port"],
+            database=DB_CONFIG["dbname"],
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"],
+            min_size=DB_POOL_MIN,
+            max_size=DB_POOL_MAX,
+            max_inactive_connection_lifetime=DB_POOL_VALIDATE_AFTER,
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        start = time.monotonic()
+        try:
+            conn = await self.pool.acquire(timeout=DB_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise PoolTimeout(
+                f"No database connection available after {DB_POOL_TIMEOUT}s"
+            )
+
+        waited = time.monotonic() - start
+        self._checkouts += 1
+        if waited > 0.001:
+            self._waits += 1
+        self._wait_time_total += waited
+        self._wait_time_max = max(self._wait_time_max, waited)
+        self._in_use += 1
+
+        try:
+            yield conn
+        finally:
+            self._in_use -= 1
+            await self.pool.release(conn)
+
+    def stats(self):
+        return {
+            "size": self.pool.get_size(),
+            "in_use": self._in_use,
+            "idle": self.pool.get_idle_size(),
+            "min": DB_POOL_MIN,
+            "max": DB_POOL_MAX,
+            "checkouts": self._checkouts,
+            "waits": self._waits,
+            "timeouts": self._timeouts,
+            "wait_ms_total": round(self._wait_time_total * 1000, 2),
+            "wait_ms_max": round(self._wait_time_max * 1000, 2),
+        }
+
+db_pool = AsyncConnectionPool()
+
+# ======================
+# Helpers
+# ======================
+
+def json_response(data, status=200):
+    return web.json_response(data, status=status)
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except json.JSONDecodeError:
+        return None
+
+# ======================
+# Request Logging
+# ======================
+
+def route_label(request):
+    # The route pattern, not the path, so /todos/1 and /todos/2 share a series
+    resource = request.match_info.route.resource
+    return resource.canonical if resource is not None else "unmatched"
+
+def log_http_request(request, status, start_time):
+    duration_s = time.time() - start_time
+    observe_request(request.method, route_label(request), status, duration_s)
+
+    logger.info(
+        "http_request",
+        extra={
+            "extra_data": {
+                "method": request.method,
+                "path": request.path,
+                "status": status,
+                "duration_ms": round(duration_s * 1000, 2),
+                "remote_addr": request.remote,
+            }
+        }
+    )
+
+@web.middleware
+async def log_request(request, handler):
+    HTTP_IN_FLIGHT.inc()
+    try:
+        return await handle_and_log(request, handler)
+    finally:
+        HTTP_IN_FLIGHT.dec()
+
+async def handle_and_log(request, handler):
+    start_time = time.time()
+
+    try:
+        response = await handler(request)
+    except PoolTimeout:
+        ERRORS.labels("PoolTimeout").inc()
+        logger.warning(
+            "db_pool_exhausted",
+            extra={"extra_data": {"path": request.path, **db_pool.stats()}}
+        )
+        response = json_response({"error": "Database busy, try again"}, 503)
+    except web.HTTPException as e:
+        log_http_request(request, e.status, start_time)
+        raise
+    except Exception as e:
+        ERRORS.labels(type(e).__name__).inc()
+        log_http_request(request, 500, start_time)
+        raise
+
+    log_http_request(request, response.status, start_time)
+    return response
+
+# ======================
+# Routes
+# ======================
+
+async def stream_todos(request, done, generation):
+    response = web.StreamResponse(headers={"Content-Type": "application/json"})
+
+    async with db_pool.acquire() as conn:
+        async with conn.transaction():
+            with observe_query("todos_stream"):
+                cur = await conn.cursor(
+                    "SELECT id, title, done FROM todos "
+                    f"WHERE {DONE_PREDICATES[done]} ORDER BY id;"
+                )
+
+            body = StreamedList(("list", done), generation)
+            await response.prepare(request)
+            await response.write(body.start().encode())
+
+            while True:
+                with observe_query("todos_stream_fetch"):
+                    rows = await cur.fetch(STREAM_CHUNK_ROWS)
+                if not rows:
+                    break
+                await response.write(body.chunk(rows).encode())
+
+    await response.write(body.finish().encode())
+    await response.write_eof()
+    return response
+
+async def get_todos(request):
+    try:
+        changes = parse_changes_args(request.query)
+        limit, after_id = parse_page_args(request.query)
+        done = parse_done_arg(request.query)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    if changes is not None:
+        # Polled for freshness, so never served from the cache
+        updated_after, after_id, limit = changes
+        _, sql = STATEMENTS["todos_changed"]
+        async with db_pool.acquire() as conn:
+            with observe_query("todos_changed"):
+                rows = await conn.fetch(sql, updated_after, after_id, limit + 1)
+        return json_response(changes_page(rows, limit))
+
+    generation = todo_cache.generation
+
+    if limit is None:
+        cached = todo_cache.get(("list", done))
+        if cached is not None:
+            return web.Response(text=cached, content_type="application/json")
+        return await stream_todos(request, done, generation)
+
+    cache_key = ("list", done, after_id, limit)
+    page = todo_cache.get(cache_key)
+    if page is not None:
+        return json_response(page)
+
+    async with db_pool.acquire() as conn:
+        # Fetch one extra row to know whether another page exists
+        name = PAGE_STATEMENTS[done]
+        _, sql = STATEMENTS[name]
+        with observe_query(name):
+            rows = await conn.fetch(sql, after_id, limit + 1)
+
+    todos = [dict(row) for row in rows[:limit]]
+    next_after_id = todos[-1]["id"] if len(rows) > limit else None
+    page = {"todos": todos, "next_after_id": next_after_id}
+    todo_cache.set(cache_key, page, generation)
+
+    return json_response(page)
+
+async def create_todo(request):
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        data = None
+    title, reason = validate_title(data.get("title") if data else None)
+
+    if reason == "missing_or_empty_title":
+        logger.warning(
+            "todo_rejected",
+            extra={"extra_data": {"reason": reason}}
+        )
+        return json_response({"error": TITLE_ERRORS[reason]}, 400)
+
+    if reason == "title_too_long":
+        logger.warning(
+            "todo_rejected",
+            extra={
+                "extra_data": {
+                    "reason": reason,
+                    "length": len(title),
+                    "max_length": MAX_TODO_LENGTH,
+                    "title_preview": title[:50],
+                }
+            }
+        )
+        return json_response({"error": TITLE_ERRORS[reason]}, 400)
+
+    generation = todo_cache.generation
+    async with db_pool.acquire() as conn:
+        with observe_query("todo_insert"):
+            row = await conn.fetchrow(
+                "INSERT INTO todos (title, done) VALUES ($1, $2) RETURNING id, title, done;",
+                title, bool(data.get("done", False))
+            )
+
+    todo = dict(row)
+    invalidate_and_cache_todo(todo, generation)
+
+    logger.info(
+        "todo_created",
+        extra={
+            "extra_data": {
+                "todo_id": todo["id"],
+                "title_length": len(todo["title"]),
+                "done": todo["done"],
+            }
+        }
+    )
+
+    return json_response(todo, 201)
+
+async def get_todo(request):
+    todo_id = int(request.match_info["todo_id"])
+    if todo_id > MAX_TODO_ID:
+        return json_response({"error": "Todo not found"}, 404)
+
+    generation = todo_cache.generation
+    todo = todo_cache.get(("todo", todo_id))
+    if todo is not None:
+        return json_response(todo)
+
+    async with db_pool.acquire() as conn:
+        with observe_query("todo_by_id"):
+            row = await conn.fetchrow(
+                "SELECT id, title, done FROM todos WHERE id = $1;",
+                todo_id
+            )
+
+    if not row:
+        return json_response({"error": "Todo not found"}, 404)
+
+    todo = dict(row)
+    todo_cache.set(("todo", todo_id), todo, generation)
+    return json_response(todo)
+
+async def update_todo(request):
+    todo_id = int(request.match_info["todo_id"])
+    if todo_id > MAX_TODO_ID:
+        return json_response({"error": "Todo not found"}, 404)
+
+    data = await read_json(request)
+    if not data or not isinstance(data, dict):
+        return json_response({"error": "No data provided"}, 400)
+
+    fields = []
+    values = []
+
+    if "title" in data:
+        title, reason = validate_title(data["title"])
+        if reason == "missing_or_empty_title":
+            return json_response({"error": "'title' cannot be empty"}, 400)
+
+        if reason == "title_too_long":
+            logger.warning(
+                "todo_update_rejected",
+                extra={
+                    "extra_data": {
+                        "todo_id": todo_id,
+                        "reason": reason,
+                        "length": len(title),
+                        "max_length": MAX_TODO_LENGTH,
+                    }
+                }
+            )
+            return json_response({"error": TITLE_ERRORS[reason]}, 400)
+
+        values.append(title)
+        fields.append("title")
+
+    if "done" in data:
+        values.append(bool(data["done"]))
+        fields.append("done")
+
+    if not fields:
+        return json_response({"error": "No valid fields to update"}, 400)
+
+    values.append(todo_id)
+
+    # Same statements as the sync mode: one per field combination
+    name = "todo_update_" + "_".join(fields)
+    _, sql = STATEMENTS[name]
+
+    generation = todo_cache.generation
+    async with db_pool.acquire() as conn:
+        with observe_query(name):
+            row = await conn.fetchrow(sql, *values)
+
+    if not row:
+        return json_response({"error": "Todo not found"}, 404)
+
+    todo = dict(row)
+    invalidate_and_cache_todo(todo, generation)
+
+    logger.info(
+        "todo_updated",
+        extra={
+            "extra_data": {
+                "todo_id": todo["id"],
+                "title_length": len(todo["title"]),
+                "done": todo["done"],
+            }
+        }
+    )
+
+    return json_response(todo)
+
+async def delete_todo(request):
+    todo_id = int(request.match_info["todo_id"])
+    if todo_id > MAX_TODO_ID:
+        return json_response({"error": "Todo not found"}, 404)
+
+    async with db_pool.acquire() as conn:
+        with observe_query("todo_delete"):
+            deleted = await conn.fetchrow(
+                "DELETE FROM todos WHERE id = $1 RETURNING id;",
+                todo_id
+            )
+
+    if not deleted:
+        return json_response({"error": "Todo not found"}, 404)
+
+    invalidate_todos(todo_id)
+
+    logger.info(
+        "todo_deleted",
+        extra={"extra_data": {"todo_id": todo_id}}
+    )
+
+    return json_response({"message": "Todo deleted successfully"})
+
+# ======================
+# Batch Routes
+# ======================
+
+async def read_batch(request):
+    """Return (items, None) for a valid batch body, or (None, error_response)."""
+    items = await read_json(request)
+
+    shape_error = batch_shape_error(items)
+    if shape_error:
+        message, status = shape_error
+        return None, json_response({"error": message}, status)
+
+    return items, None
+
+def reject_batch(event, items, errors):
+    log_batch_rejected(event, items, errors)
+    return json_response({
+        "error": "Batch rejected, no changes were made",
+        "errors": errors,
+    }, 400)
+
+async def copy_insert_todos(conn, rows):
+    """Insert (title, done) rows through COPY into a temp table."""
+    await conn.execute("""
+        CREATE TEMP TABLE todos_import (
+            position INTEGER,
+            title TEXT,
+            done BOOLEAN
+        ) ON COMMIT DROP;
+    """)
+    await conn.copy_records_to_table(
+        "todos_import",
+        records=[(position, title, done) for position, (title, done) in enumerate(rows)],
+        columns=["position", "title", "done"],
+    )
+    return await conn.fetch("""
+        INSERT INTO todos (title, done)
+        SELECT title, done FROM todos_import ORDER BY position
+        RETURNING id, title, done;
+    """)
+
+async def create_todos_batch(request):
+    items, error = await read_batch(request)
+    if error:
+        return error
+
+    rows, errors = validate_create_items(items)
+    if errors:
+        return reject_batch("todo_batch_rejected", items, errors)
+
+    async with db_pool.acquire() as conn:
+        async with conn.transaction():
+            if len(rows) >= BATCH_COPY_THRESHOLD:
+                with observe_query("todos_batch_copy"):
+                    created = await copy_insert_todos(conn, rows)
+            else:
+                with observe_query("todos_batch_insert"):
+                    created = await conn.fetch(
+                        """
+                        INSERT INTO todos (title, done)
+                        SELECT * FROM unnest($1::text[], $2::boolean[])
+                        RETURNING id, title, done;
+                        """,
+                        [title for title, _ in rows],
+                        [done for _, done in rows],
+                    )
+
+    todos = [dict(row) for row in created]
+    invalidate_todos()
+
+    logger.info(
+        "todo_batch_created",
+        extra={
+            "extra_data": {
+                "count": len(todos),
+                "method": "copy" if len(rows) >= BATCH_COPY_THRESHOLD else "values",
+            }
+        }
+    )
+
+    return json_response({"todos": todos}, 201)
+
+async def update_todos_batch(request):
+    items, error = await read_batch(request)
+    if error:
+        return error
+
+    rows, errors = validate_update_items(items)
+    if errors:
+        return reject_batch("todo_batch_update_rejected", items, errors)
+
+    async with db_pool.acquire() as conn:
+        with observe_query("todos_batch_update"):
+            updated = await conn.fetch(
+                """
+                UPDATE todos AS t
+                SET title = COALESCE(v.title, t.title),
+                    done = COALESCE(v.done, t.done)
+                FROM unnest($1::integer[], $2::text[], $3::boolean[]) AS v (id, title, done)
+                WHERE t.id = v.id
+                RETURNING t.id, t.title, t.done;
+                """,
+                [todo_id for todo_id, _, _ in rows],
+                [title for _, title, _ in rows],
+                [done for _, _, done in rows],
+            )
+
+    by_id = {row["id"]: dict(row) for row in updated}
+    invalidate_todos(*by_id)
+
+    todos = [by_id[todo_id] for todo_id, _, _ in rows if todo_id in by_id]
+    not_found = [todo_id for todo_id, _, _ in rows if todo_id not in by_id]
+
+    logger.info(
+        "todo_batch_updated",
+        extra={"extra_data": {"count": len(todos), "not_found": len(not_found)}}
+    )
+
+    return json_response({"todos": todos, "not_found": not_found})
+
+async def delete_todos_batch(request):
+    ids, error = await read_batch(request)
+    if error:
+        return error
+
+    errors = validate_delete_ids(ids)
+    if errors:
+        return reject_batch("todo_batch_delete_rejected", ids, errors)
+
+    async with db_pool.acquire() as conn:
+        with observe_query("todos_batch_delete"):
+            rows = await conn.fetch(
+                "DELETE FROM todos WHERE id = ANY($1::integer[]) RETURNING id;",
+                ids
+            )
+
+    deleted = {row["id"] for row in rows}
+    invalidate_todos(*deleted)
+
+    not_found = [todo_id for todo_id in ids if todo_id not in deleted]
+
+    logger.info(
+        "todo_batch_deleted",
+        extra={"extra_data": {"count": len(deleted), "not_found": len(not_found)}}
+    )
+
+    return json_response({"deleted": sorted(deleted), "not_found": not_found})
+
+# ======================
+# Operational Routes
+# ======================
+
+async def health_check(request):
+    return json_response({"status": "healthy"})
+
+async def stats(request):
+    return json_response({
+        "pool": db_pool.stats(),
+        "cache": todo_cache.stats(),
+        "logging": handler.stats(),
+    })
+
+async def metrics(request):
+    return web.Response(
+        body=generate_latest(),
+        headers={"Content-Type": CONTENT_TYPE_LATEST},
+    )
+
+# ======================
+# App
+# ======================
+
+async def open_pool(app):
+    await db_pool.open()
+
+async def close_pool(app):
+    await db_pool.close()
+
+def create_app():
+    app = web.Application(middlewares=[log_request])
+    app.router.add_get("/todos", get_todos)
+    app.router.add_post("/todos", create_todo)
+    app.router.add_post("/todos/batch", create_todos_batch)
+    app.router.add_put("/todos/batch", update_todos_batch)
+    app.router.add_delete("/todos/batch", delete_todos_batch)
+    app.router.add_get(r"/todos/{todo_id:\d+}", get_todo)
+    app.router.add_put(r"/todos/{todo_id:\d+}", update_todo)
+    app.router.add_delete(r"/todos/{todo_id:\d+}", delete_todo)
+    app.router.add_get("/health", health_check)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/metrics", metrics)
+    app.on_startup.append(open_pool)
+    app.on_cleanup.append(close_pool)
+    return app
+
+# ======================
+# Entrypoint
+# ======================
+
+if __name__ == "__main__":
+    init_db()
+    REGISTRY.register(StatsCollector({
+        "db_pool": db_pool,
+        "cache": todo_cache,
+        "log": handler,
+    }))
+    web.run_app(create_app(), host="0.0.0.0", port=PORT, access_log=None, print=None)
@@ -1,52 +1,440 @@
+import gzip
+import hashlib
+import io
 import os
+import tempfile
+import threading
 import time
 import urllib.request
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from html import escape
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
 import json
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
 PORT = int(os.getenv("SERVER_PORT", 8000))
 DATA_DIR = "/src/data"
 IMAGE_PATH = os.path.join(DATA_DIR, "image.jpg")
+NEXT_IMAGE_PATH = os.path.join(DATA_DIR, "next.jpg")
+META_PATH = os.path.join(DATA_DIR, "meta.json")
+VARIANTS_DIR = os.path.join(DATA_DIR, "variants")
+# Sidecar files used before meta.json; migrated on startup
 TIMESTAMP_PATH = os.path.join(DATA_DIR, "timestamp.txt")
 EXPIRED_ONCE_PATH = os.path.join(DATA_DIR, "expired_once.txt")
 IMAGE_URL = "https://picsum.photos/1200"
 CACHE_SECONDS = 600  # 10 minutes
+# Start downloading the next image this long before the current one expires
+PREFETCH_SECONDS = int(os.getenv("PREFETCH_SECONDS", 60))
 TODO_BACKEND_URL = "http://todo-server-svc:3001/todos"
+# Todos fetched per backend page by GET /todos?after_id=...
+TODO_PAGE_SIZE = 100
+# How often the page polls for new and edited todos; 0 disables polling
+TODO_POLL_SECONDS = int(os.getenv("TODO_POLL_SECONDS", 0))
+# ?updated_after=now starts this far back, so a page that has not seen a
+# change yet cannot miss one between two polls
+TODO_POLL_LOOKBACK_SECONDS = TODO_POLL_SECONDS + 60
+# Every poll re-reads changes from this far behind the newest one seen.
+# updated_at is when the writing transaction started, so a slow transaction
+# can commit rows that sort before changes the page already has.
+TODO_POLL_OVERLAP_SECONDS = int(os.getenv("TODO_POLL_OVERLAP_SECONDS", 30))
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", 0.5))
+BACKEND_READ_TIMEOUT = float(os.getenv("BACKEND_READ_TIMEOUT", 2))
+# Retries for idempotent (GET) backend calls only; a POST is never repeated
+BACKEND_RETRIES = int(os.getenv("BACKEND_RETRIES", 2))
+# Requests handled at once, and accepted connections allowed to wait for a
+# worker; anything beyond that is answered 503 straight away.
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 16))
+SERVER_QUEUE_DEPTH = int(os.getenv("SERVER_QUEUE_DEPTH", 64))
+# Images up to this size are served from memory; larger ones are streamed
+# from disk with sendfile. 0 always uses sendfile.
+IMAGE_MEMORY_MAX_BYTES = int(os.getenv("IMAGE_MEMORY_MAX_BYTES", 8 * 1024 * 1024))
+# Resized copies generated for srcset when Pillow is installed
+VARIANT_WIDTHS = tuple(
+    int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "300,600,1200").split(",")
+)
+# File extension -> (Pillow format, Content-Type, save options)
+VARIANT_FORMATS = {
+    "jpg": ("JPEG", "image/jpeg", {"quality": 80, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "image/webp", {"quality": 75}),
+}
+
+# Versioned image URLs (/image?v=...) never change content, so browsers may
+# cache them for a year; the bare /image URL must be revalidated.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Text responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+COMPRESSED_CACHE_ENTRIES = 32
+
+# Serialises image rotation decisions between worker threads
+image_lock = threading.Lock()
+
+def write_atomically(path, data):
+    """Write ``data`` to ``path`` so readers see the old or new file, never
+    a partial one."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+class ImageState:
+    """Freshness state of the cached image, kept in memory.
+
+    ``fetched_at`` is None until there is an image, ``expired_served``
+    records that one page view has already been shown the expired image,
+    and ``generation`` is bumped whenever the image file is replaced.
+    Every change is written to META_PATH so a restart resumes where it left
+    off, but reading the state never touches the filesystem. Mutations
+    happen under image_lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fetched_at = None
+        self.expired_served = False
+        self.generation = 0
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                meta = json.load(f)
+            self.fetched_at = meta.get("fetched_at")
+            self.expired_served = meta.get("expired_served", False)
+            self.generation = meta.get("generation", 0)
+        except FileNotFoundError:
+            self._migrate_sidecar_files()
+        except (ValueError, AttributeError) as e:
+            print(f"Error reading {self.path}: {e}")
+
+        if not os.path.exists(IMAGE_PATH):
+            self.fetched_at = None
+            self.expired_served = False
+
+    def _migrate_sidecar_files(self):
+        if not os.path.exists(IMAGE_PATH):
+            return
+        try:
+            with open(TIMESTAMP_PATH, "r") as f:
+                self.fetched_at = float(f.read())
+        except (FileNotFoundError, ValueError):
+            self.fetched_at = os.stat(IMAGE_PATH).st_mtime
+        self.expired_served = os.path.exists(EXPIRED_ONCE_PATH)
+        self.save()
+        for path in (TIMESTAMP_PATH, EXPIRED_ONCE_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def save(self):
+        write_atomically(self.path, json.dumps({
+            "fetched_at": self.fetched_at,
+            "expired_served": self.expired_served,
+            "generation": self.generation,
+        }).encode("utf-8"))
+
+    def age(self):
+        if self.fetched_at is None:
+            return None
+        return time.time() - self.fetched_at
+
+    def mark_fresh(self):
+        self.fetched_at = time.time()
+        self.expired_served = False
+        self.generation += 1
+        self.save()
+
+    def mark_expired_served(self):
+        self.expired_served = True
+        self.save()
+
+image_state = ImageState(META_PATH)
+
+# data is None when the image is too large to keep in memory
+ImageInfo = namedtuple("ImageInfo", ["data", "version", "mtime"])
+
+def stat_version(st):
+    """Version of an image too large to hash, from its os.stat() result."""
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+class ImageStore:
+    """Keeps the current image in memory.
+
+    The file is re-read only when image_state.generation changes, so serving
+    an unchanged image costs no syscalls besides the socket write. Each
+    image gets a ``version`` derived from its content, used for the ETag and
+    for versioned /image URLs.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._generation = None
+        self._info = None
+
+    def current(self):
+        """Return the current ImageInfo."""
+        generation = image_state.generation
+
+        with self._lock:
+            if generation != self._generation:
+                with open(self.path, "rb") as f:
+                    st = os.fstat(f.fileno())
+                    if st.st_size <= self.max_bytes:
+                        data = f.read()
+                        version = hashlib.sha1(data).hexdigest()[:16]
+                    else:
+                        # Not hashing a file we will not read anyway
+                        data = None
+                        version = stat_version(st)
+                self._info = ImageInfo(data, version, st.st_mtime)
+                self._generation = generation
+                variant_store.schedule(version, data, self.path)
+            return self._info
+
+ImageVariant = namedtuple("ImageVariant", ["width", "ext", "data"])
+
+class VariantStore:
+    """Resized JPEG and WebP copies of the current image.
+
+    They are generated on a background thread whenever the image version
+    changes, written to VARIANTS_DIR as ``<version>-<width>.<ext>`` so a
+    restart can reuse them, and served from memory. Without Pillow nothing
+    is generated and the original is always served.
+    """
+
+    def __init__(self, directory, widths):
+        self.directory = directory
+        self.widths = sorted(widths)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="variants")
+        self._lock = threading.Lock()
+        self._scheduled = None
+        self._version = None
+        self._variants = {}
+
+    def schedule(self, version, data, path):
+        if Image is None:
+            return
+        with self._lock:
+            if version == self._scheduled:
+                return
+            self._scheduled = version
+        self._executor.submit(self._build, version, data, path)
+
+    def _build(self, version, data, path):
+        try:
+            variants = self._load_or_generate(version, data, path)
+        except Exception as e:
+            print(f"Error generating image variants: {e}")
+            return
+
+        with self._lock:
+            self._version = version
+            self._variants = variants
+        self._remove_other_versions(version)
 
-def fetch_new_image():
+    def _load_or_generate(self, version, data, path):
+        variants = {}
+        image = None
+
+        for width in self.widths:
+            for ext, (pil_format, _, options) in VARIANT_FORMATS.items():
+                variant_path = os.path.join(self.directory, f"{version}-{width}.{ext}")
+                if os.path.exists(variant_path):
+                    with open(variant_path, "rb") as f:
+                        variants[(width, ext)] = f.read()
+                    continue
+
+                if image is None:
+                    image = Image.open(io.BytesIO(data) if data is not None else path)
+                    image = image.convert("RGB")
+                if width < image.width:
+                    height = round(image.height * width / image.width)
+                    resized = image.resize((width, height), Image.LANCZOS)
+                else:
+                    resized = image
+
+                out = io.BytesIO()
+                resized.save(out, pil_format, **options)
+                variants[(width, ext)] = out.getvalue()
+                write_atomically(variant_path, variants[(width, ext)])
+
+        return variants
+
+    def _remove_other_versions(self, version):
+        for name in os.listdir(self.directory):
+            if not name.startswith(f"{version}-"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def get(self, version, width, webp):
+        """Return the smallest variant at least ``width`` wide, or None if
+        the variants for ``version`` are not ready."""
+        with self._lock:
+            if version != self._version:
+                return None
+            variants = self._variants
+
+        chosen = next((w for w in self.widths if w >= width), self.widths[-1])
+        ext = "webp" if webp else "jpg"
+        return ImageVariant(chosen, ext, variants[(chosen, ext)])
+
+variant_store = VariantStore(VARIANTS_DIR, VARIANT_WIDTHS)
+
+image_store = ImageStore(IMAGE_PATH, IMAGE_MEMORY_MAX_BYTES)
+
+def ensure_image():
+    """Fetch the image if there is none yet, then return image_store.current()."""
+    with image_lock:
+        if image_state.fetched_at is None:
+            _fetch_new_image()
+        return image_store.current()
+
+def download_image(dest):
+    """Download a new image to ``dest`` atomically: readers see either the
+    old file or the complete new one, never a partial download."""
     os.makedirs(DATA_DIR, exist_ok=True)
-    urllib.request.urlretrieve(IMAGE_URL, IMAGE_PATH)
-    with open(TIMESTAMP_PATH, "w") as f:
-        f.write(str(time.time()))
-    # Reset expired-once flag
-    if os.path.exists(EXPIRED_ONCE_PATH):
-        os.remove(EXPIRED_ONCE_PATH)
-
-def image_age():
-    if not os.path.exists(TIMESTAMP_PATH):
-        return None
-    with open(TIMESTAMP_PATH, "r") as f:
-        return time.time() - float(f.read())
+    fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, suffix=".part")
+    os.close(fd)
+    try:
+        urllib.request.urlretrieve(IMAGE_URL, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def _fetch_new_image():
+    download_image(IMAGE_PATH)
+    image_state.mark_fresh()
+    image_refresher.wake()
+
+def rotate_image():
+    """Swap in the prefetched image if it is ready.
+
+    Otherwise keep serving the current one and ask the refresher to fetch
+    a replacement now (stale-while-revalidate).
+    """
+    if not os.path.exists(NEXT_IMAGE_PATH):
+        image_refresher.wake()
+        return
+
+    os.replace(NEXT_IMAGE_PATH, IMAGE_PATH)
+    image_state.mark_fresh()
+    image_refresher.wake()
+
+class ImageRefresher(threading.Thread):
+    """Prefetches the next image into NEXT_IMAGE_PATH in the background,
+    PREFETCH_SECONDS before the current one expires, so page views never
+    wait on a download once the first image exists."""
+
+    RETRY_SECONDS = 30
 
-def fetch_todos():
+    def __init__(self):
+        super().__init__(name="image-refresher", daemon=True)
+        self._wake = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def seconds_until_prefetch(self):
+        if os.path.exists(NEXT_IMAGE_PATH):
+            # Nothing to do until rotate_image() consumes it and wakes us
+            return None
+        age = image_state.age()
+        if age is None:
+            # The first image is downloaded inline by the first page view,
+            # which wakes us once it exists
+            return None
+        return CACHE_SECONDS - PREFETCH_SECONDS - age
+
+    def run(self):
+        while True:
+            delay = self.seconds_until_prefetch()
+            if delay is None or delay > 0:
+                self._wake.wait(timeout=delay)
+                self._wake.clear()
+                continue
+
+            try:
+                download_image(NEXT_IMAGE_PATH)
+            except Exception as e:
+                print(f"Error prefetching image: {e}")
+                self._wake.wait(timeout=self.RETRY_SECONDS)
+                self._wake.clear()
+
+image_refresher = ImageRefresher()
+
+def make_backend_session():
+    """Session with a keep-alive pool big enough for every worker thread."""
+    session = requests.Session()
+    retry = Retry(
+        total=BACKEND_RETRIES,
+        backoff_factor=0.1,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=SERVER_WORKERS,
+        max_retries=retry,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+backend_session = make_backend_session()
+BACKEND_TIMEOUT = (BACKEND_CONNECT_TIMEOUT, BACKEND_READ_TIMEOUT)
+
+def fetch_todos(params=None):
+    """Return the backend's raw JSON todo list, or None if it is unavailable.
+
+    The body is left unparsed so the page renderer can skip json.loads()
+    when the list has not changed since the last render.
+    """
     try:
-        response = requests.get(TODO_BACKEND_URL, timeout=2)
+        response = backend_session.get(
+            TODO_BACKEND_URL, params=params, timeout=BACKEND_TIMEOUT
+        )
         response.raise_for_status()
-        todos = response.json()
-        return todos
+        return response.content
     except Exception as e:
         print(f"Error fetching todos: {e}")
-        return []
+        return None
 
 def create_todo(title, done=False):
     try:
         payload = {"title": title, "done": done}
-        response = requests.post(
+        response = backend_session.post(
             TODO_BACKEND_URL,
             json=payload,
             headers={"Content-Type": "application/json"},
-            timeout=2
+            timeout=BACKEND_TIMEOUT
         )
         response.raise_for_status()
         return response.json()
@@ -54,117 +442,445 @@ def create_todo(title, done=False):
         print(f"Error creating todo: {e}")
         return None
 
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+  <head>
+    <title>Random Image + Todos</title>
+    <style>
+      body { font-family: Arial, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px; }
+      input, button { padding: 10px; margin: 5px; }
+      input[type="text"] { width: 300px; }
+      button { background-color: #4CAF50; color: white; border: none; cursor: pointer; }
+      button:hover { background-color: #45a049; }
+      ul { list-style-type: none; padding: 0; }
+      li { padding: 10px; margin: 5px 0; background-color: #f0f0f0; border-radius: 5px; }
+    </style>
+  </head>
+  <body>
+    <h1>Cached Random Image</h1>
+    {image}
+    
+    <h2>Todo List</h2>
+    <form id="todoForm">
+      <input type="text" id="todoTitle" placeholder="Enter todo title" required>
+      <label>
+        <input type="checkbox" id="todoDone"> Done
+      </label>
+      <button type="submit">Add Todo</button>
+    </form>
+    {todos}
+    
+    <script>
+      const todoList = document.getElementById('todoList');
+
+      // Adds a todo, or updates it in place if it is already listed
+      function addTodo(todo) {
+        let li = todoList.querySelector(`li[data-id="${todo.id}"]`);
+        if (!li) {
+          li = document.createElement('li');
+          li.dataset.id = todo.id;
+          todoList.appendChild(li);
+        }
+        li.textContent = `${todo.id}: ${todo.title} (Done: ${todo.done ? 'True' : 'False'})`;
+      }
+
+      // (updated_at, id) of the last change seen; until there is one, the
+      // server picks a starting point with updated_after=now
+      let cursor = null;
+      const pollOverlapMs = {poll_overlap_seconds} * 1000;
+
+      // Each poll starts pollOverlapMs before the cursor, so rows committed
+      // late with an older updated_at are still picked up; addTodo makes
+      // the repeats harmless
+      function pollStart() {
+        if (!cursor) {
+          return 'updated_after=now';
+        }
+        const seen = Date.parse(cursor.updatedAt.replace(/([.][0-9]{3})[0-9]+/, '$1'));
+        return `updated_after=${encodeURIComponent(new Date(seen - pollOverlapMs).toISOString())}`;
+      }
+
+      async function pollTodos() {
+        try {
+          let query = pollStart();
+          while (true) {
+            const response = await fetch(`/todos?${query}`);
+            if (!response.ok) {
+              break;
+            }
+            const page = await response.json();
+            page.todos.forEach(addTodo);
+            if (page.todos.length > 0) {
+              const last = page.todos[page.todos.length - 1];
+              cursor = {updatedAt: last.updated_at, id: last.id};
+            }
+            if (page.next_after_id === null) {
+              break;
+            }
+            query = `updated_after=${encodeURIComponent(cursor.updatedAt)}&after_id=${cursor.id}`;
+          }
+        } catch (error) {
+          // Try again on the next tick
+        }
+      }
+
+      const pollSeconds = {poll_seconds};
+      if (pollSeconds > 0) {
+        setInterval(pollTodos, pollSeconds * 1000);
+      }
+
+      document.getElementById('todoForm').addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const title = document.getElementById('todoTitle').value;
+        const done = document.getElementById('todoDone').checked;
+        
+        try {
+          const response = await fetch('/todos', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({title, done})
+          });
+          
+          if (response.ok) {
+            addTodo(await response.json());
+            document.getElementById('todoForm').reset();
+          } else {
+            alert('Failed to add todo');
+          }
+        } catch (error) {
+          alert('Error: ' + error.message);
+        }
+      });
+    </script>
+  </body>
+</html>
+"""
+
+def render_image(version):
+    src = f"/image?v={version}"
+    if Image is None:
+        return f'<img src="{src}" width="600"/>'
+    srcset = ", ".join(f"{src}&amp;w={w} {w}w" for w in variant_store.widths)
+    return (
+        f'<img src="{src}&amp;w=600" srcset="{srcset}" '
+        f'sizes="(max-width: 600px) 100vw, 600px" width="600"/>'
+    )
+
+def render_todos(body):
+    todos = []
+    if body is not None:
+        try:
+            todos = json.loads(body)
+        except ValueError as e:
+            print(f"Error parsing todos: {e}")
+    return '<ul id="todoList">' + "".join(
+        f'<li data-id="{t.get("id")}">'
+        f"{t.get('id')}: {escape(str(t.get('title')))} (Done: {t.get('done')})</li>"
+        for t in todos
+    ) + "</ul>"
+
+class PageRenderer:
+    """Renders the root page from a precompiled shell.
+
+    The static HTML, CSS and JS are encoded once. The todo fragment is
+    re-rendered only when the backend's response changes, and the whole page
+    is reused until either the image or the todo list changes.
+    """
+
+    def __init__(self, template):
+        head, rest = template.split("{image}")
+        middle, tail = rest.split("{todos}")
+        self._head = head.encode("utf-8")
+        self._middle = middle.encode("utf-8")
+        self._tail = tail.encode("utf-8")
+        # (key, value) pairs, swapped atomically so readers need no lock
+        self._fragment = (None, b"")
+        self._page = (None, b"")
+
+    def render(self, image_version, todos_body):
+        todos_version = (
+            hashlib.sha1(todos_body).hexdigest() if todos_body is not None else None
+        )
+        page_key = (image_version, todos_version)
+
+        key, page = self._page
+        if key == page_key:
+            return page
+
+        key, fragment = self._fragment
+        if key != todos_version:
+            fragment = render_todos(todos_body).encode("utf-8")
+            self._fragment = (todos_version, fragment)
+
+        page = b"".join((
+            self._head, render_image(image_version).encode("utf-8"),
+            self._middle, fragment, self._tail,
+        ))
+        self._page = (page_key, page)
+        return page
+
+page_renderer = PageRenderer(
+    PAGE_TEMPLATE
+    .replace("{poll_seconds}", str(TODO_POLL_SECONDS))
+    .replace("{poll_overlap_seconds}", str(TODO_POLL_OVERLAP_SECONDS))
+)
+
+# Encoding name -> compress function, in order of preference
+ENCODERS = OrderedDict()
+if brotli is not None:
+    ENCODERS["br"] = lambda data: brotli.compress(data, quality=5)
+ENCODERS["gzip"] = lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def choose_encoding(accept_encoding):
+    """Pick the preferred encoding the client accepts, or None for identity."""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for name in ENCODERS:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+class CompressedCache:
+    """Remembers compressed copies of response bodies that get re-sent.
+
+    Entries are keyed on the identity of the body, so it only helps callers
+    that hand back the same bytes object while the content is unchanged,
+    like the page renderer; send_body() uses it only when asked to.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compress(self, body, encoding):
+        key = (id(body), encoding)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is body:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        compressed = ENCODERS[encoding](body)
+
+        with self._lock:
+            self._entries[key] = (body, compressed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+compressed_cache = CompressedCache(COMPRESSED_CACHE_ENTRIES)
+
+def refresh_image_if_expired():
+    # Image caching logic; under the lock so concurrent page views agree on
+    # whether this view is the one allowed past expiry or the one rotating.
+    # Only the very first image is downloaded inline, since there is
+    # nothing older to serve meanwhile.
+    with image_lock:
+        if image_state.fetched_at is None:
+            _fetch_new_image()
+        elif image_state.age() >= CACHE_SECONDS:
+            if image_state.expired_served:
+                rotate_image()
+            else:
+                image_state.mark_expired_served()
+
 class Handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        if self.path == "/":
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+
+        if url.path == "/":
             self.handle_root()
-        elif self.path == "/image":
+        elif url.path == "/image":
             self.handle_image()
+        elif url.path == "/todos":
+            self.handle_get_todos()
         else:
             self.send_response(404)
             self.end_headers()
             self.wfile.write(b"404 Not Found")
 
     def do_POST(self):
-        if self.path == "/todos":
+        if urlsplit(self.path).path == "/todos":
             self.handle_post_todo()
         else:
             self.send_response(404)
             self.end_headers()
             self.wfile.write(b"404 Not Found")
 
-    def handle_root(self):
-        # Image caching logic
-        if not os.path.exists(IMAGE_PATH):
-            fetch_new_image()
-        else:
-            age = image_age()
-            if age is not None and age >= CACHE_SECONDS:
-                if os.path.exists(EXPIRED_ONCE_PATH):
-                    fetch_new_image()
-                else:
-                    with open(EXPIRED_ONCE_PATH, "w") as f:
-                        f.write("used")
-
-        # Fetch todos from backend
-        todos = fetch_todos()
+    def send_body(self, status, content_type, body, cacheable=False):
+        """Send a text response, compressed if the client accepts it.
 
-        # Build HTML with form to add todos
-        todos_html = "<ul>" + "".join(
-            f"<li>{t.get('id')}: {t.get('title')} (Done: {t.get('done')})</li>" 
-            for t in todos
-        ) + "</ul>"
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-          <head>
-            <title>Random Image + Todos</title>
-            <style>
-              body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px; }}
-              input, button {{ padding: 10px; margin: 5px; }}
-              input[type="text"] {{ width: 300px; }}
-              button {{ background-color: #4CAF50; color: white; border: none; cursor: pointer; }}
-              button:hover {{ background-color: #45a049; }}
-              ul {{ list-style-type: none; padding: 0; }}
-              li {{ padding: 10px; margin: 5px 0; background-color: #f0f0f0; border-radius: 5px; }}
-            </style>
-          </head>
-          <body>
-            <h1>Cached Random Image</h1>
-            <img src="/image" width="600"/>
-            
-            <h2>Todo List</h2>
-            <form id="todoForm">
-              <input type="text" id="todoTitle" placeholder="Enter todo title" required>
-              <label>
-                <input type="checkbox" id="todoDone"> Done
-              </label>
-              <button type="submit">Add Todo</button>
-            </form>
-            {todos_html}
-            
-            <script>
-              document.getElementById('todoForm').addEventListener('submit', async (e) => {{
-                e.preventDefault();
-                const title = document.getElementById('todoTitle').value;
-                const done = document.getElementById('todoDone').checked;
-                
-                try {{
-                  const response = await fetch('/todos', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{title, done}})
-                  }});
-                  
-                  if (response.ok) {{
-                    window.location.reload();
-                  }} else {{
-                    alert('Failed to add todo');
-                  }}
-                }} catch (error) {{
-                  alert('Error: ' + error.message);
-                }}
-              }});
-            </script>
-          </body>
-        </html>
+        Pass ``cacheable`` only for bodies that are handed back as the same
+        bytes object while unchanged, like page_renderer output; anything
+        else would just push those entries out of compressed_cache.
         """
-        
-        self.send_response(200)
-        self.send_header("Content-Type", "text/html")
+        encoding = None
+        if len(body) >= COMPRESS_MIN_BYTES:
+            encoding = choose_encoding(self.headers.get("Accept-Encoding"))
+            if encoding is not None and cacheable:
+                body = compressed_cache.compress(body, encoding)
+            elif encoding is not None:
+                body = ENCODERS[encoding](body)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
         self.end_headers()
-        self.wfile.write(html.encode("utf-8"))
+        self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        self.send_body(status, "application/json", json.dumps(payload).encode("utf-8"))
+
+    def handle_root(self):
+        refresh_image_if_expired()
+        image_version = image_store.current().version
+
+        page = page_renderer.render(image_version, fetch_todos())
+
+        self.send_body(200, "text/html; charset=utf-8", page, cacheable=True)
+
+    def is_not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+
+        return False
+
+    def send_image_headers(self, status, etag, mtime, immutable):
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        if immutable:
+            self.send_header("Cache-Control", IMMUTABLE_CACHE_CONTROL)
+        else:
+            self.send_header("Cache-Control", REVALIDATE_CACHE_CONTROL)
+        if "w" in self.query:
+            self.send_header("Vary", "Accept")
 
     def handle_image(self):
-        if not os.path.exists(IMAGE_PATH):
-            fetch_new_image()
-        
-        self.send_response(200)
-        self.send_header("Content-Type", "image/jpeg")
-        self.end_headers()
+        image = ensure_image()
+        immutable = self.query.get("v") == [image.version]
+        etag = f'"{image.version}"'
+        content_type = "image/jpeg"
+        data = image.data
+
+        if "w" in self.query:
+            try:
+                width = int(self.query["w"][0])
+            except ValueError:
+                width = 0
+            webp = "image/webp" in self.headers.get("Accept", "")
+            variant = variant_store.get(image.version, width, webp)
+            if variant is None:
+                # Still being generated: send the original, but do not let
+                # it be cached for good under the variant's URL
+                immutable = False
+            else:
+                etag = f'"{image.version}-{variant.width}.{variant.ext}"'
+                content_type = VARIANT_FORMATS[variant.ext][1]
+                data = variant.data
+
+        if self.is_not_modified(etag, image.mtime):
+            self.send_image_headers(304, etag, image.mtime, immutable)
+            self.end_headers()
+            return
+
+        if data is not None:
+            self.send_image_headers(200, etag, image.mtime, immutable)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        # Too big to keep in memory: let the kernel copy file -> socket
         with open(IMAGE_PATH, "rb") as f:
-            self.wfile.write(f.read())
+            st = os.fstat(f.fileno())
+            mtime = image.mtime
+            if stat_version(st) != image.version:
+                # Rotated since current() looked: describe the file we are
+                # actually sending, which ?v= never pointed at
+                etag = f'"{stat_version(st)}"'
+                mtime = st.st_mtime
+                immutable = False
+            self.send_image_headers(200, etag, mtime, immutable)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(st.st_size))
+            self.end_headers()
+            self.connection.sendfile(f, 0, st.st_size)
+
+    def handle_get_todos(self):
+        """Proxy the todo list as JSON.
+
+        Without parameters this is the whole list. With ``after_id`` it is
+        one page of todos created after that id, in the backend's
+        ``{"todos": [...], "next_after_id": ...}`` shape. With
+        ``updated_after`` (and optionally ``after_id``) it is one page of
+        todos created or edited since that cursor, which the page polls;
+        ``updated_after=now`` starts TODO_POLL_LOOKBACK_SECONDS ago by this
+        server's clock.
+        """
+        params = None
+        if "updated_after" in self.query:
+            updated_after = self.query["updated_after"][0]
+            if updated_after == "now":
+                start = datetime.now(timezone.utc) - timedelta(seconds=TODO_POLL_LOOKBACK_SECONDS)
+                updated_after = start.isoformat()
+            try:
+                datetime.fromisoformat(updated_after)
+                after_id = int(self.query.get("after_id", ["0"])[0])
+            except ValueError:
+                self.send_json(400, {"error": "Invalid 'updated_after' or 'after_id'"})
+                return
+            params = {
+                "updated_after": updated_after,
+                "after_id": after_id,
+                "limit": TODO_PAGE_SIZE,
+            }
+        elif "after_id" in self.query:
+            try:
+                after_id = int(self.query["after_id"][0])
+            except ValueError:
+                self.send_json(400, {"error": "'after_id' must be an integer"})
+                return
+            params = {"after_id": after_id, "limit": TODO_PAGE_SIZE}
+
+        body = fetch_todos(params)
+        if body is None:
+            self.send_json(502, {"error": "Failed to fetch todos"})
+            return
+        self.send_body(200, "application/json", body)
 
     def handle_post_todo(self):
         try:
@@ -176,41 +892,74 @@ class Handler(BaseHTTPRequestHandler):
             done = data.get('done', False)
             
             if not title:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Title is required"}).encode('utf-8'))
+                self.send_json(400, {"error": "Title is required"})
                 return
             
             # Create todo on backend
             result = create_todo(title, done)
             
             if result:
-                self.send_response(201)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps(result).encode('utf-8'))
+                self.send_json(201, result)
             else:
-                self.send_response(500)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Failed to create todo"}).encode('utf-8'))
+                self.send_json(500, {"error": "Failed to create todo"})
                 
         except json.JSONDecodeError:
-            self.send_response(400)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": "Invalid JSON"}).encode('utf-8'))
+            self.send_json(400, {"error": "Invalid JSON"})
         except Exception as e:
             print(f"Error handling POST: {e}")
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
+            self.send_json(500, {"error": str(e)})
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands connections to a fixed pool of worker threads.
+
+    At most ``workers`` requests run at once and ``queue_depth`` more may
+    wait for a worker. Connections beyond that get an immediate 503 instead
+    of piling up behind slow requests.
+    """
+
+    def __init__(self, server_address, handler_class, workers, queue_depth):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="http-worker"
+        )
+        self.slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            self.reject_request(request)
+            return
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def reject_request(self, request):
+        try:
+            request.sendall(
+                b"HTTP/1.0 503 Service Unavailable\r\n"
+                b"Retry-After: 1\r\n"
+                b"Content-Length: 0\r\n"
+                b"\r\n"
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
 
 def start_server():
-    server = HTTPServer(("", PORT), Handler)
-    print(f"Server started on port {PORT}")
+    image_state.load()
+    image_refresher.start()
+    server = PooledHTTPServer(("", PORT), Handler, SERVER_WORKERS, SERVER_QUEUE_DEPTH)
+    print(f"Server started on port {PORT} with {SERVER_WORKERS} workers")
     server.serve_forever()
 
 if __name__ == "__main__":
@@ -1,9 +1,12 @@
 import os
 import random
 import string
+import threading
+import time
 from datetime import datetime
 import requests
-from flask import Flask
+from flask import Flask, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, generate_latest
 
 app = Flask(__name__)
 
@@ -12,18 +15,77 @@ PING_PONG_URL = "http://ping-log-svc:3000/count"
 # Config locations
 MESSAGE = os.getenv("MESSAGE", "MESSAGE not set")
 INFO_FILE_PATH = "/config/information.txt"
+# How often to check INFO_FILE_PATH for a ConfigMap update
+CONFIG_POLL_SECONDS = float(os.getenv("CONFIG_POLL_SECONDS", 2))
+
+CONFIG_GENERATION = Gauge(
+    "log_output_config_generation",
+    "Number of times information.txt has been loaded",
+)
 
 
 def generate_random_string(length=12):
     return "".join(random.choices(string.ascii_letters + string.digits, k=length))
 
 
+class ConfigFile(threading.Thread):
+    """Keeps a ConfigMap-mounted file in memory.
+
+    Kubernetes updates a ConfigMap volume by re-pointing the ..data symlink
+    at a new directory, so the file's inode changes even when its mtime
+    does not. A background thread stat()s the path (following the
+    symlinks) every CONFIG_POLL_SECONDS and re-reads the file only when
+    its inode, mtime or size change; requests just read ``content``.
+    """
+
+    def __init__(self, path, poll_seconds):
+        super().__init__(name="config-poller", daemon=True)
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.generation = 0
+        self.content = "information.txt not found"
+        self._key = None
+        self.reload()
+
+    def reload(self):
+        try:
+            st = os.stat(self.path)
+            key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+        if key == self._key:
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                # Key from the file actually read, in case it was swapped
+                # again since the stat() above
+                st = os.fstat(f.fileno())
+                key = (st.st_ino, st.st_mtime_ns, st.st_size)
+                content = f.read().strip()
+        except Exception:
+            key = None
+            content = "information.txt not found"
+
+        self.content = content
+        self._key = key
+        self.generation += 1
+        CONFIG_GENERATION.set(self.generation)
+
+    def run(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reloading {self.path}: {e}")
+
+
+info_file = ConfigFile(INFO_FILE_PATH, CONFIG_POLL_SECONDS)
+
+
 def read_info_file():
-    try:
-        with open(INFO_FILE_PATH, "r") as f:
-            return f.read().strip()
-    except Exception:
-        return "information.txt not found"
+    return info_file.content
 
 
 @app.route("/")
@@ -47,7 +109,13 @@ def log_output():
     )
 
 
+@app.route("/metrics")
+def metrics():
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
+    info_file.start()
     app.run(host="0.0.0.0", port=8001)
 
 
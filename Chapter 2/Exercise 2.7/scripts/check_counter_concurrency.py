@@ -0,0 +1,78 @@
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Fires --requests parallel GET /pingpong calls at a running, Postgres-backed
+# ping-pong and checks that /count went up by exactly that many. Exits
+# non-zero if any request failed or an increment was lost.
+#
+# In COUNTER_MODE=batched, /count only includes the hits still buffered in
+# the pod that answers it, so with several replicas the count is polled for
+# up to --settle seconds while the other pods flush.
+
+local = threading.local()
+
+def session():
+    if not hasattr(local, "session"):
+        local.session = requests.Session()
+    return local.session
+
+def read_count(base_url):
+    response = session().get(base_url + "/count", timeout=10)
+    response.raise_for_status()
+    return response.json()["count"]
+
+def ping(base_url):
+    try:
+        response = session().get(base_url + "/pingpong", timeout=30)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that no ping-pong increment is lost")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument(
+        "--settle", type=float, default=5,
+        help="seconds to wait for batched replicas to flush (default: 5)",
+    )
+    args = parser.parse_args()
+    base_url = args.url.rstrip("/")
+
+    start = read_count(base_url)
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: ping(base_url), range(args.requests)))
+    elapsed = time.monotonic() - started_at
+
+    failed = results.count(False)
+    expected = start + args.requests - failed
+
+    deadline = time.monotonic() + args.settle
+    end = read_count(base_url)
+    while end != expected and time.monotonic() < deadline:
+        time.sleep(0.5)
+        end = read_count(base_url)
+
+    print(
+        f"{args.requests} requests in {elapsed:.1f}s "
+        f"({args.requests / elapsed:.0f} req/s), {failed} failed; "
+        f"count {start} -> {end}, expected {expected}"
+    )
+
+    if failed:
+        print("FAIL: some /pingpong requests did not return 200", file=sys.stderr)
+        sys.exit(1)
+    if end != expected:
+        print(f"FAIL: {expected - end} increments lost", file=sys.stderr)
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()